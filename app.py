@@ -6,8 +6,8 @@ from flask import Flask, render_template, request, redirect, url_for, flash, jso
 from flask_talisman import Talisman
 from flask_compress import Compress
 from flask_login import login_required, logout_user, current_user
-from sqlalchemy import or_, desc, text
-from sqlalchemy.orm import joinedload
+from sqlalchemy import and_, or_, desc, text
+from sqlalchemy.orm import joinedload, raiseload, selectinload
 from functools import wraps
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
@@ -16,7 +16,7 @@ from flask_caching import Cache
 from config import Config
 from flask_wtf.csrf import CSRFProtect
 from models import db, User, Admin, Game, Tournament, TournamentParticipant, TournamentMatch
-from auth import login_manager, login_user_by_netid, login_admin, create_user, get_current_user, get_current_admin, validate_admin_password
+from auth import login_manager, login_user_by_netid, login_admin, create_users_bulk, get_current_user, get_current_admin, validate_admin_password
 from elo import update_ratings_after_game, update_ratings_after_doubles_game
 from tournament_logic import activate_tournament, report_match_result
 from cache_utils import CacheManager, invalidate_game_caches, invalidate_user_caches, invalidate_tournament_caches
@@ -244,35 +244,14 @@ def index():
     
     user = get_current_user()
     
-    # Get recent games with eager loading - limit to 10 directly
-    recent_games = Game.query.options(
-        joinedload(Game.player1),
-        joinedload(Game.player2),
-        joinedload(Game.player3),
-        joinedload(Game.player4)
-    ).filter(
-        or_(
-            Game.player1_netid == user.netid,
-            Game.player2_netid == user.netid,
-            Game.player3_netid == user.netid,
-            Game.player4_netid == user.netid
-        )
-    ).order_by(desc(Game.timestamp)).limit(10).all()
+    # Get recent games (read-only rows with player names) - limit to 10 directly
+    recent_games = Game.recent_row_view(10, netid=user.netid)
     
     # Get leaderboard (top 10) - only active users who have played at least one game (cached)
     cache_key = 'leaderboard:top10'
     leaderboard = cache.get(cache_key)
     if leaderboard is None:
-        leaderboard = User.query.filter_by(archived=False, is_active=True)\
-            .filter(
-                or_(
-                    User.games_as_player1.any(),
-                    User.games_as_player2.any(),
-                    User.games_as_player3.any(),
-                    User.games_as_player4.any()
-                )
-            )\
-            .order_by(desc(User.elo_rating)).limit(10).all()
+        leaderboard = User.leaderboard_rows(limit=10)
         cache.set(cache_key, leaderboard, timeout=60)
     
     # Get user's rank (among active users who have played at least one game) - cached per user
@@ -281,29 +260,12 @@ def index():
     user_rank = cache.get(rank_cache_key)
     if user_rank is None:
         # Check if user has played any games
-        has_played = db.session.query(
-            db.exists().where(
-                or_(
-                    Game.player1_netid == user.netid,
-                    Game.player2_netid == user.netid,
-                    Game.player3_netid == user.netid,
-                    Game.player4_netid == user.netid
-                )
-            )
-        ).scalar()
-        
-        if has_played:
+        if user.get_stats().total:
             user_rank = User.query.filter(
                 User.elo_rating > user.elo_rating,
                 User.archived == False,
-                User.is_active == True
-            ).filter(
-                or_(
-                    User.games_as_player1.any(),
-                    User.games_as_player2.any(),
-                    User.games_as_player3.any(),
-                    User.games_as_player4.any()
-                )
+                User.is_active == True,
+                User.has_played()
             ).count() + 1
         else:
             user_rank = None  # No rank if user hasn't played
@@ -313,8 +275,8 @@ def index():
     open_cache_key = 'tournaments:open'
     open_tournaments = cache.get(open_cache_key)
     if open_tournaments is None:
-        open_tournaments = Tournament.query.filter_by(status='open')\
-            .order_by(desc(Tournament.created_at)).all()
+        open_tournaments = Tournament.with_counts(
+            Tournament.status == 'open', order_by=desc(Tournament.created_at))
         cache.set(open_cache_key, open_tournaments, timeout=120)
     
     # Get active tournaments user is in (not cached - personalized)
@@ -521,7 +483,9 @@ def game_history():
             joinedload(Game.player1),
             joinedload(Game.player2),
             joinedload(Game.player3),
-            joinedload(Game.player4)
+            joinedload(Game.player4),
+            joinedload(Game.tournament),
+            raiseload('*')
         ).order_by(desc(Game.timestamp)).limit(per_page).offset((page - 1) * per_page).all()
         
         total_games = Game.query.count()
@@ -560,7 +524,7 @@ def delete_game(game_id):
             return redirect(url_for('game_history'))
         
         # Check if user participated in the game
-        if user.netid not in game.get_all_player_netids():
+        if user.netid not in game.all_player_netids:
             flash("You can only delete games you participated in.", "error")
             return redirect(url_for('game_history'))
         
@@ -576,7 +540,7 @@ def delete_game(game_id):
             return redirect(url_for('game_history'))
         
         # Reverse ELO changes
-        if game.is_doubles():
+        if game.is_doubles:
             # For doubles, reverse ELO for all 4 players
             player1 = User.query.get(game.player1_netid)
             player2 = User.query.get(game.player2_netid)
@@ -589,7 +553,7 @@ def delete_game(game_id):
                 return redirect(url_for('game_history'))
             
             # Determine winning and losing teams
-            if game.winner_netid in game.get_team1_netids():
+            if game.winner_netid in game.team1_netids:
                 # Team 1 won
                 player1.elo_rating -= game.elo_change
                 player2.elo_rating -= game.elo_change
@@ -642,32 +606,14 @@ def leaderboard():
         users = cache.get(cache_key)
         if users is None:
             # Filter users who have played at least one game
-            users = User.query.filter_by(archived=False)\
-                .filter(
-                    or_(
-                        User.games_as_player1.any(),
-                        User.games_as_player2.any(),
-                        User.games_as_player3.any(),
-                        User.games_as_player4.any()
-                    )
-                )\
-                .order_by(desc(User.elo_rating)).all()
+            users = User.leaderboard_rows(include_inactive=True)
             cache.set(cache_key, users, timeout=120)
     else:
         # Regular users only see active users who have played at least one game
         cache_key = 'leaderboard:users:full'
         users = cache.get(cache_key)
         if users is None:
-            users = User.query.filter_by(archived=False, is_active=True)\
-                .filter(
-                    or_(
-                        User.games_as_player1.any(),
-                        User.games_as_player2.any(),
-                        User.games_as_player3.any(),
-                        User.games_as_player4.any()
-                    )
-                )\
-                .order_by(desc(User.elo_rating)).all()
+            users = User.leaderboard_rows()
             cache.set(cache_key, users, timeout=120)
     return render_template("leaderboard.html", users=users)
 
@@ -681,13 +627,20 @@ def search_users():
     if len(query) < 2:
         return jsonify([])
     
-    # Search by netid, first name, or last name
+    # Search by netid or name ("first", "last" or "first last"); both
+    # columns have trigram indexes, so the substring match can use them.
+    # full_name falls back to the netid until both names are set, so a user
+    # with only one name filled in is matched on first/last name directly
+    # (partial trigram index over just those rows)
     # Only show active users (admins can see all via admin panel)
     users = User.query.filter(
         or_(
             User.netid.ilike(f"%{query}%"),
-            User.first_name.ilike(f"%{query}%"),
-            User.last_name.ilike(f"%{query}%")
+            User._full_name.ilike(f"%{query}%"),
+            and_(
+                User._full_name == User.netid,
+                or_(User.first_name.ilike(f"%{query}%"), User.last_name.ilike(f"%{query}%"))
+            )
         ),
         User.archived == False,
         User.is_active == True
@@ -716,20 +669,20 @@ def tournaments():
     
     open_tournaments = cache.get(open_key)
     if open_tournaments is None:
-        open_tournaments = Tournament.query.filter_by(status='open')\
-            .order_by(desc(Tournament.created_at)).all()
+        open_tournaments = Tournament.with_counts(
+            Tournament.status == 'open', order_by=desc(Tournament.created_at))
         cache.set(open_key, open_tournaments, timeout=120)
     
     active_tournaments = cache.get(active_key)
     if active_tournaments is None:
-        active_tournaments = Tournament.query.filter_by(status='active')\
-            .order_by(desc(Tournament.created_at)).all()
+        active_tournaments = Tournament.with_counts(
+            Tournament.status == 'active', order_by=desc(Tournament.created_at))
         cache.set(active_key, active_tournaments, timeout=120)
     
     completed_tournaments = cache.get(completed_key)
     if completed_tournaments is None:
-        completed_tournaments = Tournament.query.filter_by(status='completed')\
-            .order_by(desc(Tournament.created_at)).limit(10).all()
+        completed_tournaments = Tournament.with_counts(
+            Tournament.status == 'completed', order_by=desc(Tournament.created_at), limit=10)
         cache.set(completed_key, completed_tournaments, timeout=300)
     
     return render_template(
@@ -744,8 +697,15 @@ def tournaments():
 def tournament_detail(tournament_id):
     """View tournament details and bracket"""
     tournament = Tournament.query.get_or_404(tournament_id)
-    participants = tournament.participants.order_by(TournamentParticipant.seed).all()
-    matches = tournament.matches.order_by(
+    # The bracket shows every participant's name: load the users up front, and
+    # make any relationship access on those users fail loudly instead of
+    # lazy-loading per row. p.tournament / match.tournament stay usable: the
+    # participant's resolves from the identity map (no SQL) and the match's is
+    # joined in by its mapper default.
+    participants = TournamentParticipant.query.filter_by(tournament_id=tournament_id)\
+        .options(selectinload(TournamentParticipant.user).raiseload('*'))\
+        .order_by(TournamentParticipant.seed).all()
+    matches = TournamentMatch.query.filter_by(tournament_id=tournament_id).order_by(
         TournamentMatch.bracket,
         TournamentMatch.round_number,
         TournamentMatch.match_number
@@ -817,6 +777,9 @@ def tournament_signup(tournament_id):
     db.session.add(participant)
     db.session.commit()
     
+    # Cached open-tournament lists carry participant counts
+    cache.delete_many('tournaments:open', 'tournaments:open:list')
+    
     flash(f"Successfully signed up for {tournament.name}!", "success")
     return redirect(url_for('tournament_detail', tournament_id=tournament_id))
 
@@ -949,13 +912,8 @@ def admin_dashboard():
     total_tournaments = Tournament.query.count()
     active_tournaments = Tournament.query.filter_by(status='active').count()
     
-    # Recent games with eager loading
-    recent_games = Game.query.options(
-        joinedload(Game.player1),
-        joinedload(Game.player2),
-        joinedload(Game.player3),
-        joinedload(Game.player4)
-    ).order_by(desc(Game.timestamp)).limit(10).all()
+    # Recent games (read-only rows with player names)
+    recent_games = Game.recent_row_view(10)
     
     return render_template(
         "admin/dashboard.html",
@@ -978,9 +936,11 @@ def admin_users():
         return redirect(url_for('index'))
     
     # Separate active users (profile completed) and inactive users (profile not completed)
-    active_users = User.query.filter_by(archived=False, is_active=True).order_by(User.netid).all()
-    inactive_users = User.query.filter_by(archived=False, is_active=False).order_by(User.netid).all()
-    archived_users = User.query.filter_by(archived=True).order_by(User.netid).all()
+    # Rows are rendered from their own columns only; raiseload catches any lazy load
+    users = User.query.options(raiseload('*'))
+    active_users = users.filter_by(archived=False, is_active=True).order_by(User.netid).all()
+    inactive_users = users.filter_by(archived=False, is_active=False).order_by(User.netid).all()
+    archived_users = users.filter_by(archived=True).order_by(User.netid).all()
     
     return render_template(
         "admin/users.html",
@@ -1018,33 +978,17 @@ def admin_add_user():
         flash("No valid NetIDs provided.", "error")
         return redirect(url_for('admin_users'))
     
-    # Add each user
+    # Add all users in one INSERT
     added = []
     skipped = []
     errors = []
     
-    print(f"[DEBUG] Starting to process {len(netids)} netid(s)")
-    for netid in netids:
-        print(f"[DEBUG] Processing netid: {netid}")
-        try:
-            success, result = create_user(netid)
-            print(f"[DEBUG] create_user returned: success={success}, result={result}")
-            if success:
-                added.append(netid)
-                print(f"[DEBUG] Successfully added: {netid}")
-            else:
-                if "already exists" in result.lower():
-                    skipped.append(netid)
-                    print(f"[DEBUG] Skipped (already exists): {netid}")
-                else:
-                    errors.append(f"{netid}: {result}")
-                    print(f"[DEBUG] Error adding {netid}: {result}")
-        except Exception as e:
-            error_msg = f"{netid}: {str(e)}"
-            errors.append(error_msg)
-            print(f"[DEBUG] Exception adding {netid}: {e}")
-            import traceback
-            traceback.print_exc()
+    success, result = create_users_bulk(netids)
+    if success:
+        added, skipped, invalid = result
+        errors.extend(f"{netid}: Invalid NetID format" for netid in invalid)
+    else:
+        errors.append(result)
     
     print(f"[DEBUG] Results - Added: {len(added)}, Skipped: {len(skipped)}, Errors: {len(errors)}")
     
@@ -1112,7 +1056,7 @@ def admin_delete_user(netid):
     user = User.query.get_or_404(netid)
     
     # Check if user has any games
-    if user.get_all_games():
+    if user.get_stats().total:
         flash("Cannot delete user with game history. Archive instead.", "error")
         return redirect(url_for('admin_users'))
     
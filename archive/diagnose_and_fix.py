@@ -125,11 +125,10 @@ try:
         
         test_netid = "test_diagnostic_user"
         
-        # Clean up if exists
-        existing = User.query.get(test_netid)
-        if existing:
-            db.session.delete(existing)
-            db.session.commit()
+        # Clean up if exists (a DELETE of a missing row is a no-op, no lookup needed)
+        deleted = db.session.execute(User.__table__.delete().where(User.netid == test_netid)).rowcount
+        db.session.commit()
+        if deleted:
             print(f"  (Cleaned up existing test user)")
         
         # Try to create
@@ -4,14 +4,21 @@ Migration script to add composite indexes for critical query performance.
 This adds advanced indexes beyond the basic ones for maximum performance.
 
 Usage:
-    python3 migrate_add_composite_indexes.py
+    python3 migrate_add_composite_indexes.py            # live database
+    python3 migrate_add_composite_indexes.py --offline  # maintenance window
 
 Expected runtime: ~2-5 seconds depending on database size
 Safe to run multiple times (uses IF NOT EXISTS)
+Safe to run against a live database (uses CREATE INDEX CONCURRENTLY)
+--offline skips CONCURRENTLY and sends every statement in one round trip,
+committed as a single transaction; it blocks writes while the indexes
+build, so only use it with the app down.
 """
 
 import sys
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -19,48 +26,232 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from sqlalchemy import create_engine, text
 from config import Config
 
-def add_composite_indexes():
+# (index name, CREATE statement). CONCURRENTLY builds the index without taking
+# a lock that blocks inserts/updates, so this is safe to run against a live
+# database. It cannot run inside a transaction, hence AUTOCOMMIT below.
+# {concurrently} is filled in per run mode.
+INDEXES = [
+    # User table composite indexes for leaderboard queries
+    ("idx_users_active_elo",
+     "CREATE INDEX {concurrently}IF NOT EXISTS idx_users_active_elo ON users(archived, is_active, elo_rating DESC);"),
+    # Partial covering index for the public leaderboard (active, unarchived users
+    # only) so it can be answered with an index-only scan. idx_users_active_elo
+    # still serves the admin leaderboard, which includes inactive users.
+    ("idx_users_leaderboard",
+     "CREATE INDEX {concurrently}IF NOT EXISTS idx_users_leaderboard ON users(elo_rating DESC) INCLUDE (first_name, last_name, netid) WHERE archived = false AND is_active = true;"),
+    
+    # Hash index for equality-only netid lookups and joins: entries hold a
+    # 4-byte hash rather than the full varchar key. The primary key b-tree
+    # stays, since hash indexes can't enforce uniqueness or back FKs.
+    ("idx_users_netid_hash",
+     "CREATE INDEX {concurrently}IF NOT EXISTS idx_users_netid_hash ON users USING HASH (netid);"),
+    
+    # Game table composite indexes for efficient game history queries
+    ("idx_games_p1_timestamp",
+     "CREATE INDEX {concurrently}IF NOT EXISTS idx_games_p1_timestamp ON games(player1_netid, timestamp DESC);"),
+    ("idx_games_p2_timestamp",
+     "CREATE INDEX {concurrently}IF NOT EXISTS idx_games_p2_timestamp ON games(player2_netid, timestamp DESC);"),
+    ("idx_games_p3_timestamp",
+     "CREATE INDEX {concurrently}IF NOT EXISTS idx_games_p3_timestamp ON games(player3_netid, timestamp DESC) WHERE player3_netid IS NOT NULL;"),
+    ("idx_games_p4_timestamp",
+     "CREATE INDEX {concurrently}IF NOT EXISTS idx_games_p4_timestamp ON games(player4_netid, timestamp DESC) WHERE player4_netid IS NOT NULL;"),
+    
+    # One GIN index over all four player slots, matching Game.involves()
+    # (ARRAY[...] @> ARRAY[netid]) so "games netid played in" is a single
+    # index lookup instead of four BitmapOr'd scans
+    ("idx_games_players_gin",
+     "CREATE INDEX {concurrently}IF NOT EXISTS idx_games_players_gin ON games USING GIN ((ARRAY[player1_netid, player2_netid, player3_netid, player4_netid])) WITH (fastupdate = on);"),
+    
+    # Game table covering index for winner statistics. INCLUDE carries the
+    # columns a "recent games won by X" row needs, allowing index-only scans.
+    ("idx_games_winner_ts_cov",
+     "CREATE INDEX {concurrently}IF NOT EXISTS idx_games_winner_ts_cov ON games(winner_netid, timestamp DESC) INCLUDE (player1_netid, player2_netid, elo_change);"),
+    
+    # Hash index for winner_netid = ? probes (win counts, EXISTS checks)
+    # that don't need timestamp order
+    ("idx_games_winner_hash",
+     "CREATE INDEX {concurrently}IF NOT EXISTS idx_games_winner_hash ON games USING HASH (winner_netid);"),
+    
+    # Tournament composite index for filtering
+    ("idx_tournaments_status_created",
+     "CREATE INDEX {concurrently}IF NOT EXISTS idx_tournaments_status_created ON tournaments(status, created_at DESC);"),
+    
+    # Tournament participants composite index
+    ("idx_tournament_participants_composite",
+     "CREATE INDEX {concurrently}IF NOT EXISTS idx_tournament_participants_composite ON tournament_participants(tournament_id, user_netid);"),
+    
+    # Tournament matches: bracket advancement, the losers-slot search and the
+    # bracket page all filter or sort on (tournament_id, bracket, round, match)
+    ("idx_tournament_matches_lookup",
+     "CREATE INDEX {concurrently}IF NOT EXISTS idx_tournament_matches_lookup ON tournament_matches(tournament_id, bracket, round_number, match_number);"),
+    
+    # Unfinished matches only, for the completion check after each result
+    ("idx_tournament_matches_incomplete",
+     "CREATE INDEX {concurrently}IF NOT EXISTS idx_tournament_matches_incomplete ON tournament_matches(tournament_id) WHERE completed = false;"),
+]
+
+INDEX_NAMES = [index_name for index_name, _ in INDEXES]
+
+# Concurrent builds run on this many connections at once. Builds on the same
+# table are still serialized, since CONCURRENTLY builds on one table block
+# each other.
+MAX_PARALLEL_BUILDS = 4
+
+# Old index -> the INDEXES entry replacing it. The old one is dropped only
+# once its replacement has been built and is valid.
+SUPERSEDED_INDEXES = {
+    "idx_games_winner_timestamp": "idx_games_winner_ts_cov",
+    "idx_tournament_matches_composite": "idx_tournament_matches_lookup",
+}
+
+def index_is_invalid(conn, index_name):
+    """True if a previous CONCURRENTLY build failed and left an INVALID index behind"""
+    return bool(conn.execute(text("""
+        SELECT NOT i.indisvalid
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE c.relname = :name
+    """), {"name": index_name}).scalar())
+
+def create_index_concurrently(conn, index_name, sql):
+    """
+    Build one index with CREATE INDEX CONCURRENTLY.
+    A failed concurrent build leaves an INVALID index that IF NOT EXISTS would
+    then skip forever, so drop it and build once more.
+    """
+    try:
+        conn.execute(text(sql))
+    except Exception:
+        if not index_is_invalid(conn, index_name):
+            raise
+    
+    if index_is_invalid(conn, index_name):
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name};"))
+        conn.execute(text(sql))
+
+def index_table(sql):
+    """Table an INDEXES statement builds on"""
+    return re.search(r"\bON (\w+)", sql).group(1)
+
+def create_table_indexes(engine, indexes):
+    """
+    Build one table's indexes in order on a dedicated AUTOCOMMIT connection.
+    Returns (index name, error) for each index that failed.
+    """
+    failures = []
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for index_name, sql in indexes:
+            try:
+                create_index_concurrently(conn, index_name, index_sql(sql))
+            except Exception as e:
+                failures.append((index_name, e))
+    return failures
+
+def create_indexes_parallel(engine):
+    """
+    Build INDEXES with CONCURRENTLY, one worker per table, so wall time is
+    the slowest table's builds rather than the sum of all of them.
+    """
+    by_table = {}
+    for index_name, sql in INDEXES:
+        by_table.setdefault(index_table(sql), []).append((index_name, sql))
+    
+    with ThreadPoolExecutor(max_workers=MAX_PARALLEL_BUILDS) as pool:
+        results = pool.map(lambda indexes: create_table_indexes(engine, indexes), by_table.values())
+        for failures in results:
+            for index_name, e in failures:
+                # Other indexes are still built even if one fails
+                print(f"✗ {index_name}: {e}")
+
+def index_sql(sql, concurrently=True):
+    """Render an INDEXES statement for the chosen run mode"""
+    return sql.format(concurrently="CONCURRENTLY " if concurrently else "")
+
+def create_indexes_batched(conn):
+    """
+    Create every index without CONCURRENTLY in a single round trip.
+    Runs inside the caller's transaction; savepoints keep a rejected batch
+    or a single failing index from aborting it. Falls back to one statement
+    at a time for drivers that reject multi-statement strings.
+    """
+    batch = "\n".join(index_sql(sql, concurrently=False) for _, sql in INDEXES)
+    try:
+        with conn.begin_nested():
+            conn.exec_driver_sql(batch)
+    except Exception as e:
+        print(f"Batch rejected ({e}), creating indexes one at a time...")
+        for index_name, sql in INDEXES:
+            try:
+                with conn.begin_nested():
+                    conn.exec_driver_sql(index_sql(sql, concurrently=False))
+            except Exception as e:
+                print(f"✗ {index_name}: {e}")
+
+def drop_superseded_indexes(conn, concurrently=True):
+    """Drop indexes that an entry in INDEXES has replaced"""
+    valid = {row[0] for row in conn.execute(text("""
+        SELECT c.relname
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indisvalid AND c.relname = ANY(:names)
+    """), {"names": list(SUPERSEDED_INDEXES.values())})}
+    for index_name, replacement in SUPERSEDED_INDEXES.items():
+        if replacement not in valid:
+            print(f"✗ keeping {index_name}: {replacement} was not built")
+            continue
+        try:
+            if concurrently:
+                conn.exec_driver_sql(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name};")
+            else:
+                with conn.begin_nested():
+                    conn.exec_driver_sql(f"DROP INDEX IF EXISTS {index_name};")
+        except Exception as e:
+            print(f"✗ dropping {index_name}: {e}")
+
+def existing_indexes(conn):
+    """
+    Map each of our indexes that exists to its table.
+    Looks the names up in pg_class (relname is indexed) rather than
+    scanning the pg_indexes view.
+    """
+    return dict(conn.execute(text("""
+        SELECT c.relname, t.relname
+        FROM pg_class c
+        JOIN pg_index i ON i.indexrelid = c.oid
+        JOIN pg_class t ON t.oid = i.indrelid
+        WHERE c.relname = ANY(:names)
+    """), {"names": INDEX_NAMES}).fetchall())
+
+def print_index_status(conn):
+    """Report which of our indexes exist"""
+    existing = existing_indexes(conn)
+    for idx, (index_name, _) in enumerate(INDEXES, 1):
+        mark = "✓" if index_name in existing else "✗ missing"
+        print(f"[{idx}/{len(INDEXES)}] {index_name} {mark}")
+
+def add_composite_indexes(offline=False):
     """Add composite indexes to optimize complex queries"""
     engine = create_engine(Config.SQLALCHEMY_DATABASE_URI)
     
-    indexes_to_add = [
-        # User table composite indexes for leaderboard queries
-        "CREATE INDEX IF NOT EXISTS idx_users_active_elo ON users(archived, is_active, elo_rating DESC);",
-        
-        # Game table composite indexes for efficient game history queries
-        "CREATE INDEX IF NOT EXISTS idx_games_p1_timestamp ON games(player1_netid, timestamp DESC);",
-        "CREATE INDEX IF NOT EXISTS idx_games_p2_timestamp ON games(player2_netid, timestamp DESC);",
-        "CREATE INDEX IF NOT EXISTS idx_games_p3_timestamp ON games(player3_netid, timestamp DESC) WHERE player3_netid IS NOT NULL;",
-        "CREATE INDEX IF NOT EXISTS idx_games_p4_timestamp ON games(player4_netid, timestamp DESC) WHERE player4_netid IS NOT NULL;",
-        
-        # Game table index for winner statistics
-        "CREATE INDEX IF NOT EXISTS idx_games_winner_timestamp ON games(winner_netid, timestamp DESC);",
-        
-        # Tournament composite index for filtering
-        "CREATE INDEX IF NOT EXISTS idx_tournaments_status_created ON tournaments(status, created_at DESC);",
-        
-        # Tournament participants composite index
-        "CREATE INDEX IF NOT EXISTS idx_tournament_participants_composite ON tournament_participants(tournament_id, user_netid);",
-        
-        # Tournament matches composite index
-        "CREATE INDEX IF NOT EXISTS idx_tournament_matches_composite ON tournament_matches(tournament_id, round_number, match_number);",
-    ]
-    
     print("=" * 70)
     print("Adding composite database indexes for maximum performance...")
     print("=" * 70)
     
-    with engine.connect() as conn:
-        for idx, sql in enumerate(indexes_to_add, 1):
-            try:
-                index_name = sql.split('idx_')[1].split(' ON')[0] if 'idx_' in sql else f"index_{idx}"
-                print(f"[{idx}/{len(indexes_to_add)}] Creating {index_name}...", end=" ")
-                conn.execute(text(sql))
-                conn.commit()
-                print("✓")
-            except Exception as e:
-                print(f"✗ Error: {e}")
-                # Continue with other indexes even if one fails
+    if offline:
+        # Plain CREATE INDEX can share one transaction: a single commit for
+        # every index and the drops, instead of one per statement
+        with engine.begin() as conn:
+            create_indexes_batched(conn)
+            drop_superseded_indexes(conn, concurrently=False)
+            print_index_status(conn)
+    else:
+        create_indexes_parallel(engine)
+        
+        # CONCURRENTLY refuses to run inside a transaction block
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            drop_superseded_indexes(conn)
+            
+            print_index_status(conn)
     
     print("\n" + "=" * 70)
     print("✓ Composite index migration completed successfully!")
@@ -83,17 +274,10 @@ def verify_indexes():
     print("\nVerifying indexes...")
     with engine.connect() as conn:
         # Check for our composite indexes
-        result = conn.execute(text("""
-            SELECT schemaname, tablename, indexname 
-            FROM pg_indexes 
-            WHERE indexname LIKE 'idx_%'
-            ORDER BY tablename, indexname
-        """))
-        
-        indexes = result.fetchall()
+        indexes = sorted((table, index) for index, table in existing_indexes(conn).items())
         if indexes:
             print(f"\n✓ Found {len(indexes)} performance indexes:")
-            for schema, table, index in indexes:
+            for table, index in indexes:
                 print(f"  • {table}.{index}")
         else:
             print("\n⚠ Warning: No indexes found")
@@ -103,7 +287,7 @@ def verify_indexes():
 
 if __name__ == '__main__':
     try:
-        add_composite_indexes()
+        add_composite_indexes(offline='--offline' in sys.argv[1:])
         
         # Verify indexes were created
         if verify_indexes():
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Migration script to add denormalized wins/losses/games_played counters to
+the users table.
+
+This script:
+- Adds users.wins, users.losses and users.games_played (INTEGER NOT NULL DEFAULT 0)
+- Installs the games trigger that keeps them up to date on insert/delete
+- Backfills the counters from the existing games (User.rebuild_stats)
+
+Safe to re-run: it re-installs the latest trigger and recounts everything.
+
+Profile and leaderboard pages then read a user's record straight off the
+users row instead of counting games on every view.
+
+Usage:
+    python migrate_add_counters.py
+"""
+
+import sys
+from app import app
+from models import db, User, USER_COUNTERS_TRIGGER_SQL
+from sqlalchemy import text
+
+def migrate_add_counters():
+    """Add counter columns, install the trigger, and backfill"""
+    
+    with app.app_context():
+        print("Starting migration: add wins/losses counters to users table...")
+        
+        try:
+            print("Adding 'wins', 'losses' and 'games_played' columns...")
+            db.session.execute(text("""
+                ALTER TABLE users
+                    ADD COLUMN IF NOT EXISTS wins INTEGER NOT NULL DEFAULT 0,
+                    ADD COLUMN IF NOT EXISTS losses INTEGER NOT NULL DEFAULT 0,
+                    ADD COLUMN IF NOT EXISTS games_played INTEGER NOT NULL DEFAULT 0;
+            """))
+            
+            # Block game inserts/deletes until the trigger is live and the
+            # backfill has committed, so no game is missed or counted twice
+            db.session.execute(text("LOCK TABLE games IN SHARE MODE;"))
+            
+            print("Installing games trigger...")
+            db.session.execute(text(USER_COUNTERS_TRIGGER_SQL))
+            
+            print("Backfilling counters from existing games...")
+            players_with_games = User.rebuild_stats()
+            
+            db.session.commit()
+            print(f"✓ Backfilled counters ({players_with_games} users have games).")
+            
+            # Spot-check the most active players against a recount from games
+            print("\nVerifying counters...")
+            sample = User.query.order_by(User.games_played.desc()).limit(5).all()
+            for user in sample:
+                expected = User.compute_stats(user.netid)
+                mark = "✓" if user.get_stats() == expected else f"✗ expected {expected.wins}-{expected.losses}"
+                print(f"  - {user.netid}: {user.wins}-{user.losses} {mark}")
+            print("\n✓ Migration completed successfully!")
+            print("\nNext steps:")
+            print("1. Restart your application server")
+            
+        except Exception as e:
+            print(f"\n✗ Migration failed: {e}")
+            db.session.rollback()
+            import traceback
+            traceback.print_exc()
+            sys.exit(1)
+
+if __name__ == "__main__":
+    print("=" * 70)
+    print("Charter Pool - Add game counters migration")
+    print("=" * 70)
+    print()
+    
+    response = input("This will modify the database. Continue? (yes/no): ")
+    if response.lower() != 'yes':
+        print("Migration cancelled.")
+        sys.exit(0)
+    
+    print()
+    migrate_add_counters()
@@ -1,62 +1,74 @@
 """
 Database Migration: Add Doubles Support
-Adds game_type, player3_netid, and player4_netid columns to games table
+Adds game_type (as the game_type_enum type), player3_netid, and player4_netid
+columns to games table
 """
 import sys
 from app import app
 from models import db
 from sqlalchemy import text
 
+# Advisory lock key shared by migrations that must not run concurrently
+MIGRATION_LOCK_KEY = 'charterpool.migrations'
+
 def migrate():
     """Add doubles support columns to games table"""
     with app.app_context():
         try:
-            # Check if columns already exist
-            result = db.session.execute(text("""
-                SELECT column_name 
-                FROM information_schema.columns 
-                WHERE table_name='games' AND column_name IN ('game_type', 'player3_netid', 'player4_netid')
-            """))
-            existing_columns = [row[0] for row in result]
+            print("[INFO] Starting database migration to add doubles support...")
             
-            if 'game_type' in existing_columns and 'player3_netid' in existing_columns and 'player4_netid' in existing_columns:
-                print("[INFO] All columns already exist. No migration needed.")
-                return
+            # Fail fast if a lock can't be had or a statement hangs, rather than
+            # queueing live requests behind us. SET LOCAL ends with the transaction.
+            db.session.execute(text("SET LOCAL lock_timeout = '5s'"))
+            db.session.execute(text("SET LOCAL statement_timeout = '60s'"))
             
-            print("[INFO] Starting database migration to add doubles support...")
+            # One migration at a time; the xact lock is released at commit/rollback
+            db.session.execute(
+                text("SELECT pg_advisory_xact_lock(hashtext(:key))"),
+                {"key": MIGRATION_LOCK_KEY}
+            )
             
-            # Add game_type column
-            if 'game_type' not in existing_columns:
-                print("[INFO] Adding game_type column...")
-                db.session.execute(text("""
-                    ALTER TABLE games 
-                    ADD COLUMN game_type VARCHAR(20) DEFAULT 'singles' NOT NULL
-                """))
-                print("[SUCCESS] Added game_type column")
-            else:
-                print("[INFO] game_type column already exists")
+            # Lock users before games: the same order game reports touch them
+            # (ELO update, then insert), so the REFERENCES users ALTER below
+            # can't deadlock with an in-flight report
+            db.session.execute(text("LOCK TABLE users IN SHARE ROW EXCLUSIVE MODE"))
+            db.session.execute(text("LOCK TABLE games IN ACCESS EXCLUSIVE MODE"))
             
-            # Add player3_netid column
-            if 'player3_netid' not in existing_columns:
-                print("[INFO] Adding player3_netid column...")
-                db.session.execute(text("""
-                    ALTER TABLE games 
-                    ADD COLUMN player3_netid VARCHAR(50) REFERENCES users(netid)
-                """))
-                print("[SUCCESS] Added player3_netid column")
-            else:
-                print("[INFO] player3_netid column already exists")
+            # game_type only ever holds 'singles' or 'doubles': store it as a
+            # 4-byte enum rather than a VARCHAR(20)
+            db.session.execute(text("""
+                DO $$
+                BEGIN
+                    CREATE TYPE game_type_enum AS ENUM ('singles', 'doubles');
+                EXCEPTION WHEN duplicate_object THEN NULL;
+                END $$;
+            """))
+            
+            # One ALTER TABLE takes the ACCESS EXCLUSIVE lock once for all three
+            # columns; IF NOT EXISTS (PostgreSQL 9.6+) makes re-runs a no-op
+            db.session.execute(text("""
+                ALTER TABLE games
+                    ADD COLUMN IF NOT EXISTS game_type game_type_enum DEFAULT 'singles' NOT NULL,
+                    ADD COLUMN IF NOT EXISTS player3_netid VARCHAR(50) REFERENCES users(netid),
+                    ADD COLUMN IF NOT EXISTS player4_netid VARCHAR(50) REFERENCES users(netid)
+            """))
+            print("[SUCCESS] game_type, player3_netid and player4_netid columns are present")
             
-            # Add player4_netid column
-            if 'player4_netid' not in existing_columns:
-                print("[INFO] Adding player4_netid column...")
+            # Databases migrated before the enum existed have a VARCHAR game_type
+            current_type = db.session.execute(text("""
+                SELECT format_type(atttypid, atttypmod)
+                FROM pg_attribute
+                WHERE attrelid = 'games'::regclass AND attname = 'game_type'
+            """)).scalar()
+            if current_type != 'game_type_enum':
+                print(f"[INFO] Converting game_type from {current_type} to game_type_enum...")
                 db.session.execute(text("""
-                    ALTER TABLE games 
-                    ADD COLUMN player4_netid VARCHAR(50) REFERENCES users(netid)
+                    ALTER TABLE games
+                        ALTER COLUMN game_type DROP DEFAULT,
+                        ALTER COLUMN game_type TYPE game_type_enum USING game_type::game_type_enum,
+                        ALTER COLUMN game_type SET DEFAULT 'singles'
                 """))
-                print("[SUCCESS] Added player4_netid column")
-            else:
-                print("[INFO] player4_netid column already exists")
+                print("[SUCCESS] Converted game_type to game_type_enum")
             
             # Commit changes
             db.session.commit()
@@ -64,10 +76,12 @@ def migrate():
             
             # Verify the migration
             result = db.session.execute(text("""
-                SELECT column_name, data_type, is_nullable
-                FROM information_schema.columns 
-                WHERE table_name='games' AND column_name IN ('game_type', 'player3_netid', 'player4_netid')
-                ORDER BY column_name
+                SELECT attname, format_type(atttypid, atttypmod), NOT attnotnull
+                FROM pg_attribute
+                WHERE attrelid = 'games'::regclass
+                  AND attname = ANY(ARRAY['game_type', 'player3_netid', 'player4_netid'])
+                  AND NOT attisdropped
+                ORDER BY attname
             """))
             print("\n[INFO] Verification - New columns:")
             for row in result:
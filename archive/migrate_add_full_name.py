@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Migration script to store users.full_name as a generated column.
+
+This script:
+- Adds users.full_name TEXT GENERATED ALWAYS AS (...) STORED
+  ("First Last" once both names are set, otherwise the netid)
+- Enables pg_trgm and adds trigram indexes on full_name and netid so the
+  user search's substring matches can use an index, plus a partial one on
+  first_name/last_name for users whose full_name is still the netid
+
+Adding a stored generated column rewrites the users table, so run this
+with the application stopped.
+
+Mandatory upgrade step for existing databases (see README, Step 2): the
+user search filters on User._full_name, so it fails until this has run.
+
+Usage:
+    python migrate_add_full_name.py
+"""
+
+import sys
+from app import app
+from models import db, FULL_NAME_SQL
+from sqlalchemy import text
+
+def migrate_add_full_name():
+    """Add the full_name generated column and trigram search indexes"""
+    
+    with app.app_context():
+        print("Starting migration: add full_name generated column to users table...")
+        
+        try:
+            print("Adding 'full_name' column...")
+            db.session.execute(text(f"""
+                ALTER TABLE users
+                    ADD COLUMN IF NOT EXISTS full_name TEXT
+                    GENERATED ALWAYS AS ({FULL_NAME_SQL}) STORED;
+            """))
+            
+            print("Adding trigram indexes for user search...")
+            try:
+                # pg_trgm ships with postgresql-contrib, which may not be
+                # installed; search still works without the indexes, just slower
+                with db.session.begin_nested():
+                    db.session.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm;"))
+                    db.session.execute(text(
+                        "CREATE INDEX IF NOT EXISTS idx_users_fullname_trgm ON users USING GIN (full_name gin_trgm_ops);"
+                    ))
+                    db.session.execute(text(
+                        "CREATE INDEX IF NOT EXISTS idx_users_netid_trgm ON users USING GIN (netid gin_trgm_ops);"
+                    ))
+                    # Only users with one name missing: search matches them on
+                    # first/last name since their full_name is the netid
+                    db.session.execute(text(
+                        "CREATE INDEX IF NOT EXISTS idx_users_partial_name_trgm ON users USING GIN (first_name gin_trgm_ops, last_name gin_trgm_ops) WHERE full_name = netid;"
+                    ))
+                print("✓ Trigram indexes added.")
+            except Exception as e:
+                print(f"⚠ Skipping trigram indexes (is postgresql-contrib installed?): {e}")
+            
+            db.session.commit()
+            print("✓ Column 'full_name' added successfully.")
+            print("\n✓ Migration completed successfully!")
+            print("\nNext steps:")
+            print("1. Restart your application server")
+            
+        except Exception as e:
+            print(f"\n✗ Migration failed: {e}")
+            db.session.rollback()
+            import traceback
+            traceback.print_exc()
+            sys.exit(1)
+
+if __name__ == "__main__":
+    print("=" * 70)
+    print("Charter Pool - Add full_name generated column migration")
+    print("=" * 70)
+    print()
+    
+    response = input("This will modify the database. Continue? (yes/no): ")
+    if response.lower() != 'yes':
+        print("Migration cancelled.")
+        sys.exit(0)
+    
+    print()
+    migrate_add_full_name()
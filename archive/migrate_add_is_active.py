@@ -6,15 +6,25 @@ This script adds the is_active column and sets it to:
 - True for users who have both first_name and last_name
 - False for users who don't have first_name or last_name (pending activation)
 
+The backfill drops the is_active index, runs the UPDATEs, and rebuilds it
+with CREATE INDEX CONCURRENTLY, so a large table isn't paying per-row index
+maintenance. Users is locked for the duration of the UPDATEs.
+
 Usage:
     python migrate_add_is_active.py
 """
 
 import sys
 from app import app
-from models import db, User
+from models import db
 from sqlalchemy import text
 
+# Advisory lock key shared by migrations that must not run concurrently
+MIGRATION_LOCK_KEY = 'charterpool.migrations'
+
+# Index declared by User.is_active (index=True)
+IS_ACTIVE_INDEX_SQL = "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_is_active ON users (is_active);"
+
 def migrate_add_is_active():
     """Add is_active column and populate it based on existing data"""
     
@@ -22,11 +32,12 @@ def migrate_add_is_active():
         print("Starting migration: add is_active column to users table...")
         
         try:
-            # Check if column already exists
+            # Check if column already exists (direct catalog lookup rather
+            # than the information_schema view)
             result = db.session.execute(text("""
-                SELECT column_name 
-                FROM information_schema.columns 
-                WHERE table_name='users' AND column_name='is_active';
+                SELECT attname
+                FROM pg_attribute
+                WHERE attrelid = 'users'::regclass AND attname = 'is_active' AND NOT attisdropped;
             """))
             
             if result.fetchone():
@@ -41,33 +52,49 @@ def migrate_add_is_active():
                 db.session.commit()
                 print("✓ Column 'is_active' added successfully.")
             
-            # Update existing users: set is_active=True if they have both first_name and last_name
+            # Update existing users: set is_active=True if they have both first_name and last_name.
+            # Two set-based UPDATEs instead of loading and flushing every User row.
             print("\nUpdating existing users...")
-            users = User.query.all()
-            
-            active_count = 0
-            inactive_count = 0
-            
-            for user in users:
-                if user.first_name and user.last_name:
-                    user.is_active = True
-                    active_count += 1
-                else:
-                    user.is_active = False
-                    inactive_count += 1
+            # One migration at a time; the xact lock is released at commit/rollback
+            db.session.execute(
+                text("SELECT pg_advisory_xact_lock(hashtext(:key))"),
+                {"key": MIGRATION_LOCK_KEY}
+            )
+            # Every updated row would otherwise also write a new index entry
+            db.session.execute(text("DROP INDEX IF EXISTS ix_users_is_active;"))
+            activated = db.session.execute(text("""
+                UPDATE users SET is_active = TRUE
+                WHERE is_active = FALSE AND first_name <> '' AND last_name <> '';
+            """)).rowcount
+            deactivated = db.session.execute(text("""
+                UPDATE users SET is_active = FALSE
+                WHERE is_active = TRUE
+                  AND (COALESCE(first_name, '') = '' OR COALESCE(last_name, '') = '');
+            """)).rowcount
             
             db.session.commit()
             
-            print(f"✓ Updated {len(users)} users:")
-            print(f"  - {active_count} users set to active (have first_name and last_name)")
-            print(f"  - {inactive_count} users set to inactive (missing first_name or last_name)")
+            # CONCURRENTLY can't run inside a transaction block
+            print("Rebuilding is_active index...")
+            with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                conn.execute(text(IS_ACTIVE_INDEX_SQL))
+            
+            print(f"✓ Updated {activated + deactivated} users:")
+            print(f"  - {activated} users set to active (have first_name and last_name)")
+            print(f"  - {deactivated} users set to inactive (missing first_name or last_name)")
             
-            # Display inactive users
-            if inactive_count > 0:
-                print("\nInactive users (pending profile completion):")
-                inactive_users = User.query.filter_by(is_active=False).all()
-                for user in inactive_users:
-                    print(f"  - {user.netid}")
+            # Display inactive users. Only netid is needed, so select that one
+            # column and stream it in batches instead of loading User objects
+            inactive_netids = db.session.execute(
+                text("SELECT netid FROM users WHERE is_active = FALSE ORDER BY netid;")
+                .execution_options(yield_per=1000)
+            ).scalars()
+            header_printed = False
+            for netid in inactive_netids:
+                if not header_printed:
+                    print("\nInactive users (pending profile completion):")
+                    header_printed = True
+                print(f"  - {netid}")
             
             print("\n✓ Migration completed successfully!")
             print("\nNext steps:")
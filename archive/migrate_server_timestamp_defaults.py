@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Migration script to move created_at/timestamp defaults into the database.
+
+This script:
+- Sets DEFAULT timezone('utc', now()) on users.created_at, admins.created_at,
+  games.timestamp and tournaments.created_at
+
+The models no longer fill these in from Python (datetime.utcnow), so inserts
+leave the column out and Postgres stamps the row. Existing rows are untouched.
+
+Usage:
+    python migrate_server_timestamp_defaults.py
+"""
+
+import sys
+from app import app
+from models import db
+from sqlalchemy import text
+
+# (table, column) pairs whose default moves server-side
+TIMESTAMP_COLUMNS = [
+    ("users", "created_at"),
+    ("admins", "created_at"),
+    ("games", "timestamp"),
+    ("tournaments", "created_at"),
+]
+
+def migrate_server_timestamp_defaults():
+    """Set server-side UTC defaults on the timestamp columns"""
+    
+    with app.app_context():
+        print("Starting migration: server-side timestamp defaults...")
+        
+        try:
+            for table, column in TIMESTAMP_COLUMNS:
+                db.session.execute(text(
+                    f"ALTER TABLE {table} ALTER COLUMN {column} SET DEFAULT timezone('utc', now());"
+                ))
+                print(f"✓ {table}.{column}")
+            
+            # One commit for all four ALTERs
+            db.session.commit()
+            print("\n✓ Migration completed successfully!")
+            print("\nNext steps:")
+            print("1. Restart your application server")
+            
+        except Exception as e:
+            print(f"\n✗ Migration failed: {e}")
+            db.session.rollback()
+            import traceback
+            traceback.print_exc()
+            sys.exit(1)
+
+if __name__ == "__main__":
+    print("=" * 70)
+    print("Charter Pool - Server-side timestamp defaults migration")
+    print("=" * 70)
+    print()
+    
+    response = input("This will modify the database. Continue? (yes/no): ")
+    if response.lower() != 'yes':
+        print("Migration cancelled.")
+        sys.exit(0)
+    
+    print()
+    migrate_server_timestamp_defaults()
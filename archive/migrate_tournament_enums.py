@@ -0,0 +1,87 @@
+"""
+Database Migration: Tournament Enum Columns
+Converts tournaments.status, tournaments.format and tournament_matches.bracket
+from VARCHAR(50) to PostgreSQL enums (4 bytes per value, smaller indexes)
+
+Mandatory upgrade step for existing databases (see README, Step 2): the
+models map these columns to the enum types, so tournament inserts and
+status/bracket comparisons fail until this has run.
+"""
+import sys
+from app import app
+from models import db
+from sqlalchemy import text
+
+# (table, column, enum type, allowed values, column default)
+ENUM_COLUMNS = [
+    ("tournaments", "status", "tournament_status_enum", ("open", "active", "completed"), "open"),
+    ("tournaments", "format", "tournament_format_enum", ("single_elim", "double_elim", "round_robin"), None),
+    ("tournament_matches", "bracket", "match_bracket_enum", ("main", "winners", "losers", "grand_finals"), None),
+]
+
+def column_type(table, column):
+    """Current SQL type of table.column, e.g. 'character varying(50)'"""
+    return db.session.execute(text("""
+        SELECT format_type(atttypid, atttypmod)
+        FROM pg_attribute
+        WHERE attrelid = CAST(:table AS regclass) AND attname = :column
+    """), {"table": table, "column": column}).scalar()
+
+def migrate():
+    """Convert tournament status/format and match bracket columns to enums"""
+    with app.app_context():
+        try:
+            print("[INFO] Starting database migration to tournament enum columns...")
+            
+            for _, _, type_name, values, _ in ENUM_COLUMNS:
+                labels = ", ".join(f"'{value}'" for value in values)
+                db.session.execute(text(f"""
+                    DO $$
+                    BEGIN
+                        CREATE TYPE {type_name} AS ENUM ({labels});
+                    EXCEPTION WHEN duplicate_object THEN NULL;
+                    END $$;
+                """))
+            
+            # Group conversions per table so each table is rewritten (and its
+            # indexes rebuilt) under a single ACCESS EXCLUSIVE lock
+            per_table = {}
+            for table, column, type_name, _, default in ENUM_COLUMNS:
+                current_type = column_type(table, column)
+                if current_type == type_name:
+                    print(f"[INFO] {table}.{column} is already {type_name}")
+                    continue
+                
+                print(f"[INFO] Converting {table}.{column} from {current_type} to {type_name}...")
+                clauses = per_table.setdefault(table, [])
+                if default is not None:
+                    clauses.append(f"ALTER COLUMN {column} DROP DEFAULT")
+                clauses.append(f"ALTER COLUMN {column} TYPE {type_name} USING {column}::{type_name}")
+                if default is not None:
+                    clauses.append(f"ALTER COLUMN {column} SET DEFAULT '{default}'")
+            
+            for table, clauses in per_table.items():
+                db.session.execute(text(f"ALTER TABLE {table} " + ", ".join(clauses)))
+                print(f"[SUCCESS] Converted {table}")
+            
+            # Commit changes
+            db.session.commit()
+            print("[SUCCESS] Database migration completed successfully!")
+            
+            # Verify the migration
+            print("\n[INFO] Verification - Column types:")
+            for table, column, _, _, _ in ENUM_COLUMNS:
+                print(f"  - {table}.{column}: {column_type(table, column)}")
+            
+        except Exception as e:
+            db.session.rollback()
+            print(f"[ERROR] Migration failed: {e}")
+            import traceback
+            traceback.print_exc()
+            sys.exit(1)
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Database Migration: Tournament Enum Columns")
+    print("=" * 60)
+    migrate()
@@ -45,97 +45,103 @@ def test_models_import():
         print(f"✗ Models import failed: {e}")
         return False
 
-def test_app_has_health_endpoint():
-    """Test that health endpoint exists"""
-    print("Testing health endpoint...")
+def load_app_info():
+    """
+    Import the app once and collect what the app checks below look at:
+    route rules, error handlers and context processor names.
+    Returns None if the app fails to import.
+    """
+    print("Importing app...")
     try:
         # Import without initializing database
         import app as app_module
         
-        # Check if health route exists
-        rules = [str(rule) for rule in app_module.app.url_map.iter_rules()]
-        
-        if '/health' in rules:
-            print("✓ Health endpoint exists")
-            return True
-        else:
-            print("✗ Health endpoint not found in routes")
-            return False
+        flask_app = app_module.app
+        info = {
+            'rules': {str(rule) for rule in flask_app.url_map.iter_rules()},
+            'handlers': flask_app.error_handler_spec,
+            'processor_names': {p.__name__ for p in flask_app.template_context_processors[None]},
+        }
+        print("✓ App imports successfully")
+        return info
     except Exception as e:
-        print(f"✗ Health endpoint check failed: {e}")
+        print(f"✗ App import failed: {e}")
+        return None
+
+def test_app_has_health_endpoint(app_info):
+    """Test that health endpoint exists"""
+    print("Testing health endpoint...")
+    if app_info is None:
+        print("✗ Health endpoint check skipped: app did not import")
+        return False
+    
+    if '/health' in app_info['rules']:
+        print("✓ Health endpoint exists")
+        return True
+    else:
+        print("✗ Health endpoint not found in routes")
         return False
 
-def test_error_handlers_exist():
+def test_error_handlers_exist(app_info):
     """Test that error handlers are present"""
     print("Testing error handlers...")
-    try:
-        import app as app_module
-        
-        # Check if error handlers are registered
-        handlers = app_module.app.error_handler_spec
+    if app_info is None:
+        print("✗ Error handler check skipped: app did not import")
+        return False
+    
+    # Check if error handlers are registered
+    handlers = app_info['handlers']
+    
+    if handlers and None in handlers and 404 in handlers[None]:
+        print("✓ 404 error handler exists")
+    else:
+        print("✗ 404 error handler missing")
+        return False
         
-        if handlers and None in handlers and 404 in handlers[None]:
-            print("✓ 404 error handler exists")
-        else:
-            print("✗ 404 error handler missing")
-            return False
-            
-        if handlers and None in handlers and 500 in handlers[None]:
-            print("✓ 500 error handler exists")
-        else:
-            print("✗ 500 error handler missing")
-            return False
-            
-        return True
-    except Exception as e:
-        print(f"✗ Error handler check failed: {e}")
+    if handlers and None in handlers and 500 in handlers[None]:
+        print("✓ 500 error handler exists")
+    else:
+        print("✗ 500 error handler missing")
         return False
+        
+    return True
 
-def test_admin_login_route():
+def test_admin_login_route(app_info):
     """Test that admin login route exists"""
     print("Testing admin login route...")
-    try:
-        import app as app_module
-        
-        rules = [str(rule) for rule in app_module.app.url_map.iter_rules()]
-        
-        if '/admin/login' in rules:
-            print("✓ Admin login route exists")
-            return True
-        else:
-            print("✗ Admin login route not found")
-            return False
-    except Exception as e:
-        print(f"✗ Admin login route check failed: {e}")
+    if app_info is None:
+        print("✗ Admin login route check skipped: app did not import")
+        return False
+    
+    if '/admin/login' in app_info['rules']:
+        print("✓ Admin login route exists")
+        return True
+    else:
+        print("✗ Admin login route not found")
         return False
 
-def test_context_processors():
+def test_context_processors(app_info):
     """Test that context processors are registered"""
     print("Testing context processors...")
-    try:
-        import app as app_module
-        
-        # Check if context processors exist
-        processors = app_module.app.template_context_processors[None]
-        
-        processor_names = [p.__name__ for p in processors]
+    if app_info is None:
+        print("✗ Context processor check skipped: app did not import")
+        return False
+    
+    processor_names = app_info['processor_names']
+    
+    if 'inject_version' in processor_names:
+        print("✓ inject_version context processor exists")
+    else:
+        print("✗ inject_version context processor missing")
+        return False
         
-        if 'inject_version' in processor_names:
-            print("✓ inject_version context processor exists")
-        else:
-            print("✗ inject_version context processor missing")
-            return False
-            
-        if 'inject_user' in processor_names:
-            print("✓ inject_user context processor exists")
-        else:
-            print("✗ inject_user context processor missing")
-            return False
-            
-        return True
-    except Exception as e:
-        print(f"✗ Context processor check failed: {e}")
+    if 'inject_user' in processor_names:
+        print("✓ inject_user context processor exists")
+    else:
+        print("✗ inject_user context processor missing")
         return False
+        
+    return True
 
 def main():
     print("=" * 60)
@@ -143,20 +149,28 @@ def main():
     print("=" * 60)
     print()
     
-    tests = [
+    import_tests = [
         test_config_import,
         test_auth_import,
         test_models_import,
+    ]
+    # These share one app import and one pass over its routes
+    app_tests = [
         test_app_has_health_endpoint,
         test_error_handlers_exist,
         test_admin_login_route,
         test_context_processors,
     ]
     
+    app_info = load_app_info()
+    print()
+    
+    tests = [(test, ()) for test in import_tests] + [(test, (app_info,)) for test in app_tests]
+    
     results = []
-    for test in tests:
+    for test, args in tests:
         try:
-            result = test()
+            result = test(*args)
             results.append(result)
             print()
         except Exception as e:
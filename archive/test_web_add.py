@@ -23,11 +23,9 @@ with app.test_client() as client:
         
         test_netid = "webtest1"
         
-        # Clean up if exists
-        existing = User.query.get(test_netid)
-        if existing:
-            db.session.delete(existing)
-            db.session.commit()
+        # Clean up if exists (a DELETE of a missing row is a no-op, no lookup needed)
+        db.session.execute(User.__table__.delete().where(User.netid == test_netid))
+        db.session.commit()
         
         try:
             success, result = create_user(test_netid)
@@ -51,27 +49,26 @@ with app.test_client() as client:
         print("[2/3] Testing bulk user add...")
         
         test_netids = ["bulktest1", "bulktest2", "bulktest3"]
+        from auth import create_users_bulk
         
-        # Clean up if exists
-        for netid in test_netids:
-            existing = User.query.get(netid)
-            if existing:
-                db.session.delete(existing)
-                db.session.commit()
+        # Clean up if exists (one DELETE for the batch)
+        db.session.execute(User.__table__.delete().where(User.netid.in_(test_netids)))
+        db.session.commit()
         
         try:
-            for netid in test_netids:
-                success, result = create_user(netid)
-                if success:
-                    print(f"✓ Created: {netid} (is_active={result.is_active})")
-                else:
-                    print(f"✗ Failed {netid}: {result}")
+            success, result = create_users_bulk(test_netids)
+            if success:
+                added, skipped, invalid = result
+                for netid in added:
+                    print(f"✓ Created: {netid}")
+                for netid in skipped + invalid:
+                    print(f"✗ Unexpectedly skipped {netid}")
+            else:
+                print(f"✗ Failed: {result}")
+                sys.exit(1)
             
             # Clean up
-            for netid in test_netids:
-                user = User.query.get(netid)
-                if user:
-                    db.session.delete(user)
+            db.session.execute(User.__table__.delete().where(User.netid.in_(test_netids)))
             db.session.commit()
             print("✓ All bulk users created and cleaned up")
         except Exception as e:
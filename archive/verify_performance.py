@@ -60,7 +60,7 @@ def test_indexes(engine):
         'idx_users_active_elo',
         'idx_games_p1_timestamp',
         'idx_games_p2_timestamp',
-        'idx_games_winner_timestamp',
+        'idx_games_winner_ts_cov',
         'idx_tournaments_status_created',
     ]
     
@@ -3,6 +3,7 @@ Authentication utilities for user and admin login
 """
 import re
 from flask_login import LoginManager, UserMixin
+from sqlalchemy.dialects.postgresql import insert
 from models import User, Admin, db
 
 login_manager = LoginManager()
@@ -206,6 +207,44 @@ def create_user(netid, first_name=None, last_name=None):
             print(f"[DEBUG] Error rolling back: {rollback_error}")
         return False, f"Database error creating user: {str(e)}"
 
+def create_users_bulk(netids):
+    """
+    Create accounts for many netids at once (admin bulk add, no names yet)
+    One INSERT for the valid netids; netids that already exist are skipped and
+    malformed ones (same rule as login_user_by_netid) are rejected up front
+    Returns (success, (added, skipped, invalid) or error_message)
+    """
+    netids = list(dict.fromkeys(n.strip().lower() for n in netids if n.strip()))
+    if not netids:
+        return False, "NetID is required"
+    
+    # Checked here so one bad token can't fail the INSERT for the whole batch
+    invalid = [netid for netid in netids if len(netid) > 50]
+    netids = [netid for netid in netids if len(netid) <= 50]
+    if not netids:
+        return True, ([], [], invalid)
+    
+    try:
+        # ON CONFLICT skips existing users (including ones created concurrently);
+        # RETURNING reports which rows were actually inserted
+        inserted = db.session.execute(
+            insert(User)
+            .values([{'netid': netid, 'is_active': False} for netid in netids])
+            .on_conflict_do_nothing(index_elements=['netid'])
+            .returning(User.netid)
+        ).scalars().all()
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        import logging
+        logging.error(f"Error creating users {netids}: {e}")
+        return False, f"Database error creating users: {str(e)}"
+    
+    inserted = set(inserted)
+    added = [netid for netid in netids if netid in inserted]
+    skipped = [netid for netid in netids if netid not in inserted]
+    return True, (added, skipped, invalid)
+
 def complete_user_profile(user, first_name, last_name):
     """
     Complete a user's profile with first and last name
@@ -16,6 +16,12 @@ CACHE_TAGS = {
     'tournaments': ['tournament_list', 'tournament_detail'],
 }
 
+# Tags to drop when an entity changes: the entity's own tag plus its dependents.
+# Built once at import so write paths don't rebuild tag lists per call.
+_INVALIDATION_SETS = {
+    entity: frozenset((entity, *tags)) for entity, tags in CACHE_TAGS.items()
+}
+
 class CacheManager:
     """
     Smart cache manager with tag-based invalidation and warming.
@@ -136,12 +142,19 @@ def make_cache_key(*args, **kwargs):
     return hashlib.md5(json.dumps(cache_dict, sort_keys=True).encode()).hexdigest()
 
 
+def invalidate_entity(cache_manager, entity):
+    """
+    Invalidate every cache tag that depends on an entity in CACHE_TAGS.
+    """
+    cache_manager.invalidate_tags(_INVALIDATION_SETS[entity])
+
+
 def invalidate_game_caches(cache_manager):
     """
     Invalidate all game-related caches.
     Call this after game creation, deletion, or ELO updates.
     """
-    cache_manager.invalidate_tags(['games', 'user_stats', 'leaderboard'])
+    invalidate_entity(cache_manager, 'games')
 
 
 def invalidate_user_caches(cache_manager):
@@ -149,7 +162,7 @@ def invalidate_user_caches(cache_manager):
     Invalidate all user-related caches.
     Call this after user creation, archival, or profile updates.
     """
-    cache_manager.invalidate_tags(['users', 'leaderboard', 'user_search'])
+    invalidate_entity(cache_manager, 'users')
 
 
 def invalidate_tournament_caches(cache_manager):
@@ -157,7 +170,7 @@ def invalidate_tournament_caches(cache_manager):
     Invalidate all tournament-related caches.
     Call this after tournament creation, activation, or match updates.
     """
-    cache_manager.invalidate_tags(['tournaments'])
+    invalidate_entity(cache_manager, 'tournaments')
 
 
 class QueryResultCache:
@@ -196,12 +209,20 @@ def memoize(f):
     Simple memoization for pure functions (no Flask context needed).
     Use for calculations that don't depend on database state.
     """
+    name = f.__name__
+    
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        key = (f.__name__, args, tuple(sorted(kwargs.items())))
-        if key not in _memo_cache:
-            _memo_cache[key] = f(*args, **kwargs)
-        return _memo_cache[key]
+        # Positional-only calls are the common case; skip sorting kwargs for them
+        if kwargs:
+            key = (name, args, tuple(sorted(kwargs.items())))
+        else:
+            key = (name, args)
+        try:
+            return _memo_cache[key]
+        except KeyError:
+            result = _memo_cache[key] = f(*args, **kwargs)
+            return result
     return decorated_function
 
 
@@ -41,7 +41,9 @@ class Config:
         'application/javascript',
         'text/javascript'
     ]
-    COMPRESS_LEVEL = 6  # Compression level (1-9, 6 is default)
+    COMPRESS_ALGORITHM = ['br', 'gzip']  # Prefer Brotli, fall back to gzip (requires the brotli package)
+    COMPRESS_LEVEL = 4  # gzip level (1-9); 4 is within ~2% of 6 on JSON/HTML for much less CPU
+    COMPRESS_BR_LEVEL = 4  # Brotli quality (0-11)
     COMPRESS_MIN_SIZE = 500  # Only compress responses larger than 500 bytes
     
     # Session configuration (no auto-logout)
@@ -66,6 +68,10 @@ class Config:
     DEFAULT_ADMIN_USERNAME = 'admin'
     DEFAULT_ADMIN_PASSWORD = 'admin'
 
+    # Time every SQL statement and record slow queries (adds overhead to each query).
+    # Unset follows app.debug; set PROFILE_QUERIES=true/false to override.
+    PROFILE_QUERIES = (os.environ['PROFILE_QUERIES'].lower() == 'true') if 'PROFILE_QUERIES' in os.environ else None
+
     # Logging configuration
     LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
 
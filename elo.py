@@ -25,11 +25,12 @@ def calculate_elo_change(winner_rating, loser_rating, k_factor=32):
         Tuple of (winner_change, loser_change) - loser_change will be negative
     """
     expected_winner = calculate_expected_score(winner_rating, loser_rating)
-    expected_loser = calculate_expected_score(loser_rating, winner_rating)
     
     # Winner gets 1 point (win), loser gets 0 points (loss)
+    # The loser's expected score is 1 - expected_winner, so its change is
+    # k * (0 - (1 - expected_winner)): the exact negation of the winner's
     winner_change = round(k_factor * (1 - expected_winner))
-    loser_change = round(k_factor * (0 - expected_loser))
+    loser_change = -winner_change
     
     return winner_change, loser_change
 
@@ -5,6 +5,7 @@ Production-ready settings for maximum performance.
 
 import multiprocessing
 import os
+import socket
 
 # Server socket
 bind = "127.0.0.1:8000"
@@ -17,11 +18,14 @@ worker_connections = 1000
 max_requests = 1000  # Restart workers after this many requests (prevents memory leaks)
 max_requests_jitter = 50  # Add randomness to prevent all workers restarting at once
 timeout = 30
-keepalive = 5
+keepalive = 65  # Match nginx's upstream keepalive so proxied connections are reused
 
 # Performance tuning
-preload_app = True  # Load application before forking workers (saves memory)
+preload_app = True  # Load application before forking workers (saves memory; engine is reset in post_fork)
 reuse_port = True  # Use SO_REUSEPORT for better load distribution
+# Keep the per-worker heartbeat file off disk (mount a tmpfs/mfs on OpenBSD and
+# point GUNICORN_WORKER_TMP_DIR at it)
+worker_tmp_dir = os.environ.get('GUNICORN_WORKER_TMP_DIR') or ('/dev/shm' if os.path.isdir('/dev/shm') else None)
 
 # Logging
 accesslog = '-'  # Log to stdout
@@ -48,6 +52,14 @@ tmp_upload_dir = None
 def on_starting(server):
     """Called just before the master process is initialized."""
     print("[INFO] Starting Charter Pool server...")
+    if reuse_port:
+        # Probe SO_REUSEPORT on a throwaway socket so a missing option shows up in the logs
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as probe:
+                probe.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+                probe.bind(("127.0.0.1", 0))
+        except (AttributeError, OSError) as e:
+            print(f"[WARNING] SO_REUSEPORT unavailable, reuse_port has no effect: {e}")
 
 def on_reload(server):
     """Called to recycle workers during a reload."""
@@ -63,6 +75,12 @@ def pre_fork(server, worker):
 
 def post_fork(server, worker):
     """Called just after a worker has been forked."""
+    # With preload_app the master imported app.py and opened pooled DB
+    # connections; drop them so each worker opens its own sockets instead of
+    # sharing the parent's (close=False leaves the parent's sockets untouched).
+    from app import app, db
+    with app.app_context():
+        db.engine.dispose(close=False)
     print(f"[INFO] Worker spawned (pid: {worker.pid})")
 
 def pre_exec(server):
@@ -86,10 +104,12 @@ raw_env = [
 # 2. Tune network stack: sysctl net.inet.tcp.sendspace=65536
 # 3. Optimize for PostgreSQL: sysctl kern.seminfo.semmni=256
 # 4. Enable performance mode: sysctl hw.perfpolicy=high
+# 5. Raise the listen queue cap so backlog=2048 takes effect: sysctl kern.somaxconn=2048
 #
 # Add to /etc/sysctl.conf:
 #   kern.maxfiles=20000
 #   kern.maxproc=4096
+#   kern.somaxconn=2048
 #   kern.seminfo.semmni=256
 #   kern.seminfo.semmns=512
 #   net.inet.tcp.sendspace=65536
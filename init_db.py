@@ -2,8 +2,9 @@
 Database initialization script
 Run this to create all tables and initialize default admin account
 """
+from sqlalchemy import text
 from app import app, db
-from models import Admin
+from models import Admin, USER_COUNTERS_TRIGGER_SQL
 from config import Config
 
 def init_database():
@@ -14,6 +15,12 @@ def init_database():
         db.create_all()
         print("Tables created successfully!")
         
+        # create_all() doesn't create triggers; install the one that keeps
+        # users.wins / users.losses in sync with the games table
+        print("Installing game counter trigger...")
+        db.session.execute(text(USER_COUNTERS_TRIGGER_SQL))
+        db.session.commit()
+        
         # Check if default admin exists
         admin = Admin.query.filter_by(username=Config.DEFAULT_ADMIN_USERNAME).first()
         if not admin:
@@ -1,9 +1,83 @@
+from collections import namedtuple
+from functools import cached_property
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime
+from sqlalchemy import and_, cast, func, or_, text
+from sqlalchemy.dialects.postgresql import array
+from sqlalchemy.orm import aliased, raiseload
 from werkzeug.security import generate_password_hash, check_password_hash
 
 db = SQLAlchemy()
 
+# Insert-time default for created_at/timestamp columns. Postgres fills it in,
+# in UTC to match datetime.utcnow() used elsewhere, so inserts don't send it.
+UTC_NOW = text("timezone('utc', now())")
+
+# users.full_name generated column: "First Last" once both names are set,
+# otherwise the netid (same rule the full_name property used to apply)
+FULL_NAME_SQL = (
+    "CASE WHEN first_name <> '' AND last_name <> '' "
+    "THEN first_name || ' ' || last_name ELSE netid END"
+)
+
+# Per-user game statistics; a tuple so it is cheap to build and to cache
+GameStats = namedtuple('GameStats', ['wins', 'losses', 'total', 'win_rate'])
+
+def make_game_stats(wins, losses):
+    """Build a GameStats from win/loss counts"""
+    wins = wins or 0
+    losses = losses or 0
+    total = wins + losses
+    win_rate = round((wins / total) * 100, 1) if total > 0 else 0
+    return GameStats(wins, losses, total, win_rate)
+
+# Keeps users.wins / losses / games_played in step with the games table. Runs inside the
+# inserting/deleting transaction, so every write path (game reports, tournament
+# matches, deletions, manual SQL) is covered. Installed by init_db.py and
+# archive/migrate_add_counters.py; create_all() does not create triggers.
+USER_COUNTERS_TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION games_update_user_counters() RETURNS trigger AS $$
+DECLARE
+    g games%ROWTYPE;
+    delta INTEGER;
+    winners VARCHAR[];
+    losers VARCHAR[];
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        g := NEW;
+        delta := 1;
+    ELSE
+        g := OLD;
+        delta := -1;
+    END IF;
+    
+    IF g.game_type = 'doubles' THEN
+        IF g.winner_netid IN (g.player1_netid, g.player2_netid) THEN
+            winners := ARRAY[g.player1_netid, g.player2_netid];
+            losers := ARRAY[g.player3_netid, g.player4_netid];
+        ELSE
+            winners := ARRAY[g.player3_netid, g.player4_netid];
+            losers := ARRAY[g.player1_netid, g.player2_netid];
+        END IF;
+    ELSE
+        winners := ARRAY[g.winner_netid];
+        losers := ARRAY[CASE WHEN g.winner_netid = g.player1_netid
+                             THEN g.player2_netid ELSE g.player1_netid END];
+    END IF;
+    
+    UPDATE users SET wins = wins + delta, games_played = games_played + delta
+        WHERE netid = ANY(winners);
+    UPDATE users SET losses = losses + delta, games_played = games_played + delta
+        WHERE netid = ANY(losers);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS games_user_counters ON games;
+CREATE TRIGGER games_user_counters
+    AFTER INSERT OR DELETE ON games
+    FOR EACH ROW EXECUTE PROCEDURE games_update_user_counters();
+"""
+
 class User(db.Model):
     __tablename__ = 'users'
     
@@ -11,23 +85,32 @@ class User(db.Model):
     first_name = db.Column(db.String(100), nullable=True)  # Nullable until user completes profile
     last_name = db.Column(db.String(100), nullable=True)   # Nullable until user completes profile
     elo_rating = db.Column(db.Integer, default=1200, nullable=False, index=True)  # Index for leaderboard sorting
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    created_at = db.Column(db.DateTime, server_default=UTC_NOW, nullable=False)
     archived = db.Column(db.Boolean, default=False, nullable=False, index=True)  # Index for filtering
     is_active = db.Column(db.Boolean, default=False, nullable=False, server_default='false', index=True)  # Index for filtering
+    # Denormalized game counters, maintained by the games trigger (USER_COUNTERS_TRIGGER_SQL)
+    wins = db.Column(db.Integer, default=0, nullable=False, server_default='0')
+    losses = db.Column(db.Integer, default=0, nullable=False, server_default='0')
+    games_played = db.Column(db.Integer, default=0, nullable=False, server_default='0')
+    # Stored generated column, read through the full_name property
+    _full_name = db.Column('full_name', db.Text, db.Computed(FULL_NAME_SQL, persisted=True))
     
     # Relationships
-    games_as_player1 = db.relationship('Game', foreign_keys='Game.player1_netid', backref='player1', lazy='dynamic')
-    games_as_player2 = db.relationship('Game', foreign_keys='Game.player2_netid', backref='player2', lazy='dynamic')
+    games_as_player1 = db.relationship('Game', foreign_keys='Game.player1_netid', backref='player1', lazy='select')
+    games_as_player2 = db.relationship('Game', foreign_keys='Game.player2_netid', backref='player2', lazy='select')
     # Backrefs for doubles participants to enable eager loading and template access
-    games_as_player3 = db.relationship('Game', foreign_keys='Game.player3_netid', backref='player3', lazy='dynamic')
-    games_as_player4 = db.relationship('Game', foreign_keys='Game.player4_netid', backref='player4', lazy='dynamic')
-    tournament_participations = db.relationship('TournamentParticipant', backref='user', lazy='dynamic')
+    games_as_player3 = db.relationship('Game', foreign_keys='Game.player3_netid', backref='player3', lazy='select')
+    games_as_player4 = db.relationship('Game', foreign_keys='Game.player4_netid', backref='player4', lazy='select')
+    tournament_participations = db.relationship('TournamentParticipant', backref='user', lazy='select')
     
     def __repr__(self):
         return self.netid
     
     @property
     def full_name(self):
+        """Stored by Postgres; only computed here for rows not yet flushed"""
+        if self._full_name is not None:
+            return self._full_name
         if self.first_name and self.last_name:
             return f"{self.first_name} {self.last_name}"
         return self.netid  # Fallback if names not set yet
@@ -45,117 +128,142 @@ class User(db.Model):
             limit: Optional limit on number of games to return
         """
         try:
-            query = Game.query.filter(
-                (Game.player1_netid == self.netid) | 
-                (Game.player2_netid == self.netid) |
-                (Game.player3_netid == self.netid) | 
-                (Game.player4_netid == self.netid)
-            ).order_by(Game.timestamp.desc())
-            
-            if limit:
-                query = query.limit(limit)
-            
-            return query.all()
+            return list(self.iter_games_for_display(limit))
         except Exception as e:
             import logging
             logging.error(f"Failed to get games for user {self.netid}: {e}")
             return []
     
-    def get_game_stats(self, use_cache=True):
+    def iter_games_for_display(self, limit=None):
+        """Game objects this user played in, newest first"""
+        query = Game.query.filter(Game.involves(self.netid))\
+            .order_by(Game.timestamp.desc())
+        if limit:
+            query = query.limit(limit)
+        return iter(query)
+    
+    def iter_games_for_stats(self):
         """
-        Get game statistics efficiently (wins, losses, total) in a single pass.
-        Returns a dict with 'wins', 'losses', 'total', and 'win_rate'.
+        Unordered (id, game_type, winner_netid, player1..4_netid) rows for
+        this user's games, for callers that tally results themselves. Plain
+        rows skip ORM hydration. For counts alone use get_stats() or
+        compute_stats(), which load no rows at all.
+        """
+        return iter(db.session.query(
+            Game.id, Game.game_type, Game.winner_netid,
+            Game.player1_netid, Game.player2_netid, Game.player3_netid, Game.player4_netid
+        ).filter(Game.involves(self.netid)))
+    
+    def get_stats(self):
+        """
+        Get game statistics (wins, losses, total, win_rate) as a GameStats tuple.
         
-        Optimized version with caching and database-level counting.
+        Read from the wins/losses counters kept on the users row by the
+        games trigger (see USER_COUNTERS_TRIGGER_SQL), so no query is issued.
         """
-        try:
-            # Cache key for this user's stats
-            if use_cache:
-                from flask import current_app
-                cache = getattr(current_app, 'cache', None)
-                if cache:
-                    cache_key = f"user_stats:{self.netid}"
-                    cached_stats = cache.get(cache_key)
-                    if cached_stats:
-                        return cached_stats
-            
-            # Use database aggregation for better performance
-            from sqlalchemy import func, case
-            
-            # Count total games
-            total = Game.query.filter(
-                (Game.player1_netid == self.netid) |
-                (Game.player2_netid == self.netid) |
-                (Game.player3_netid == self.netid) |
-                (Game.player4_netid == self.netid)
-            ).count()
-            
-            if total == 0:
-                return {'wins': 0, 'losses': 0, 'total': 0, 'win_rate': 0}
-            
-            # Count wins efficiently
-            # For singles: winner_netid matches user
-            # For doubles: winner_netid is on same team as user
-            games = Game.query.filter(
-                (Game.player1_netid == self.netid) |
-                (Game.player2_netid == self.netid) |
-                (Game.player3_netid == self.netid) |
-                (Game.player4_netid == self.netid)
-            ).all()
-            
-            wins = 0
-            for game in games:
-                try:
-                    if not game or not game.winner_netid:
-                        continue
-                        
-                    if game.is_doubles():
-                        winning_netids = game.get_winning_team_netids()
-                        if winning_netids and self.netid in winning_netids:
-                            wins += 1
-                    else:
-                        if game.winner_netid == self.netid:
-                            wins += 1
-                except Exception as e:
-                    import logging
-                    logging.warning(f"Error processing game {game.id if game else 'unknown'} stats: {e}")
-                    continue
-            
-            losses = total - wins
-            win_rate = round((wins / total) * 100, 1) if total > 0 else 0
-            
-            stats = {
-                'wins': wins,
-                'losses': losses,
-                'total': total,
-                'win_rate': win_rate
-            }
-            
-            # Cache the results for 5 minutes
-            if use_cache and cache:
-                cache.set(cache_key, stats, timeout=300)
-            
-            return stats
-            
-        except Exception as e:
-            import logging
-            logging.error(f"Failed to calculate game stats for user {self.netid}: {e}")
-            return {'wins': 0, 'losses': 0, 'total': 0, 'win_rate': 0}
+        return make_game_stats(self.wins, self.losses)
+    
+    @classmethod
+    def bulk_stats(cls, netids):
+        """
+        GameStats for many users from one query, as a dict keyed by netid.
+        For callers holding netids rather than loaded User rows.
+        """
+        rows = db.session.query(cls.netid, cls.wins, cls.losses)\
+            .filter(cls.netid.in_(list(netids))).all()
+        return {netid: make_game_stats(wins, losses) for netid, wins, losses in rows}
+    
+    @classmethod
+    def has_played(cls):
+        """SQL condition: the user has at least one recorded game (from the counters)"""
+        return cls.games_played > 0
+    
+    @classmethod
+    def leaderboard_rows(cls, limit=None, include_inactive=False):
+        """
+        Unarchived users who have played a game, highest ELO first, in one query.
+        Rows carry wins/losses, so rendering win counts and rates issues no SQL;
+        relationships are raiseload'ed so a template can't add any by accident.
+        """
+        query = cls.query.options(raiseload('*'))\
+            .filter(cls.archived == False, cls.has_played())
+        if not include_inactive:
+            query = query.filter(cls.is_active == True)
+        query = query.order_by(cls.elo_rating.desc())
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+    
+    @classmethod
+    def rebuild_stats(cls):
+        """
+        Recompute every user's wins/losses/games_played from the games table.
+        
+        One GROUP BY pass over games (each game unnested into its players),
+        applied with UPDATE ... FROM. For backfills and repairs; the trigger
+        keeps the counters current otherwise. Lock games first so no game is
+        inserted or deleted mid-rebuild. The caller commits.
+        Returns the number of users that have games.
+        """
+        players = func.unnest(Game.players()).table_valued('netid').render_derived()
+        per_player = db.select(
+            players.c.netid,
+            func.count().label('games'),
+            func.count().filter(Game.won_by(players.c.netid)).label('wins')
+        ).select_from(Game).join(players, db.true())\
+            .where(players.c.netid.isnot(None))\
+            .group_by(players.c.netid)\
+            .subquery()
+        
+        # Zero anyone with no games left (e.g. after deletions), then fill in the rest
+        db.session.execute(
+            db.update(cls)
+            .where(~cls.netid.in_(db.select(per_player.c.netid)))
+            .where(or_(cls.wins != 0, cls.losses != 0, cls.games_played != 0))
+            .values(wins=0, losses=0, games_played=0)
+        )
+        return db.session.execute(
+            db.update(cls)
+            .where(cls.netid == per_player.c.netid)
+            .values(
+                wins=per_player.c.wins,
+                losses=per_player.c.games - per_player.c.wins,
+                games_played=per_player.c.games
+            )
+        ).rowcount
+    
+    @classmethod
+    def compute_stats(cls, netid):
+        """
+        Count a user's games straight from the games table as a GameStats tuple.
+        
+        One aggregate query rather than loading every game. get_stats() reads
+        the trigger-maintained counters instead; this is the recount used to
+        check them.
+        """
+        total, wins = db.session.query(
+            func.count(Game.id),
+            func.count(Game.id).filter(Game.won_by(netid))
+        ).filter(Game.involves(netid)).one()
+        return make_game_stats(wins, total - wins)
+    
+    def get_game_stats(self):
+        """
+        Get game statistics as a dict with 'wins', 'losses', 'total', and 'win_rate'.
+        """
+        return self.get_stats()._asdict()
     
     def get_win_count(self):
         """Get number of games won (singles and doubles)"""
-        # For backwards compatibility - use get_game_stats for efficiency
-        return self.get_game_stats()['wins']
+        return self.get_stats().wins
     
     def get_loss_count(self):
         """Get number of games lost (singles and doubles)"""
-        # For backwards compatibility - use get_game_stats for efficiency
-        return self.get_game_stats()['losses']
+        return self.get_stats().losses
     
     def get_win_rate(self):
         """Calculate win rate percentage"""
-        # For backwards compatibility - use get_game_stats for efficiency
-        return self.get_game_stats()['win_rate']
+        return self.get_stats().win_rate
 
 
 class Admin(db.Model):
@@ -164,23 +272,16 @@ class Admin(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
     password_hash = db.Column(db.String(255), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    created_at = db.Column(db.DateTime, server_default=UTC_NOW, nullable=False)
     
     # Relationships
-    created_tournaments = db.relationship('Tournament', backref='creator', lazy='dynamic')
+    created_tournaments = db.relationship('Tournament', backref='creator', lazy='select')
     
     def set_password(self, password):
-        print(f"[DEBUG] set_password called for admin")
         self.password_hash = generate_password_hash(password, method='pbkdf2:sha256')
-        print(f"[DEBUG] password_hash set: {self.password_hash[:50]}...")
     
     def check_password(self, password):
-        print(f"[DEBUG] check_password called")
-        print(f"[DEBUG] stored hash: {self.password_hash[:50]}...")
-        print(f"[DEBUG] password to check: '{password}'")
-        result = check_password_hash(self.password_hash, password)
-        print(f"[DEBUG] check_password_hash result: {result}")
-        return result
+        return check_password_hash(self.password_hash, password)
     
     def __repr__(self):
         return self.username
@@ -190,63 +291,114 @@ class Game(db.Model):
     __tablename__ = 'games'
     
     id = db.Column(db.Integer, primary_key=True)
-    game_type = db.Column(db.String(20), default='singles', nullable=False)  # 'singles' or 'doubles'
+    game_type = db.Column(db.Enum('singles', 'doubles', name='game_type_enum'), default='singles', nullable=False)
     player1_netid = db.Column(db.String(50), db.ForeignKey('users.netid'), nullable=False, index=True)
     player2_netid = db.Column(db.String(50), db.ForeignKey('users.netid'), nullable=False, index=True)
     player3_netid = db.Column(db.String(50), db.ForeignKey('users.netid'), nullable=True, index=True)  # Team 2, Player 1 (for doubles)
     player4_netid = db.Column(db.String(50), db.ForeignKey('users.netid'), nullable=True, index=True)  # Team 2, Player 2 (for doubles)
     winner_netid = db.Column(db.String(50), db.ForeignKey('users.netid'), nullable=False)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)  # Index for sorting by time
+    timestamp = db.Column(db.DateTime, server_default=UTC_NOW, nullable=False, index=True)  # Index for sorting by time
     tournament_id = db.Column(db.Integer, db.ForeignKey('tournaments.id'), nullable=True, index=True)
     elo_change = db.Column(db.Integer, nullable=False)  # ELO change for the winner(s)
     
+    tournament = db.relationship('Tournament', back_populates='games')
+    
     def __repr__(self):
         return f'Game {self.id}'
     
-    def is_doubles(self):
-        """Check if this is a doubles game"""
-        return self.game_type == 'doubles'
-    
-    def get_team1_netids(self):
-        """Get Team 1 player netids (always player1 and player2)"""
-        return [self.player1_netid, self.player2_netid]
+    @classmethod
+    def players(cls):
+        """ARRAY of the four player slots; same expression as idx_games_players_gin"""
+        return array([cls.player1_netid, cls.player2_netid, cls.player3_netid, cls.player4_netid])
     
-    def get_team2_netids(self):
-        """Get Team 2 player netids (player3 and player4 for doubles, empty for singles)"""
-        if self.is_doubles():
-            return [self.player3_netid, self.player4_netid]
-        return []
+    @classmethod
+    def involves(cls, netid):
+        """
+        SQL condition: netid played in the game (any of the four slots).
+        Written as array containment so one GIN index lookup replaces four
+        OR'd per-slot index scans.
+        """
+        # Bound strings arrive as text; the slots are varchar, and @> needs matching types
+        return cls.players().contains(array([cast(netid, db.String)]))
     
-    def get_winning_team_netids(self):
-        """Get the netids of the winning team/player"""
-        try:
-            if not self.winner_netid:
-                return []
-                
-            if self.is_doubles():
-                # For doubles, winner_netid represents one player, find their team
-                team1 = self.get_team1_netids()
-                if self.winner_netid in team1:
-                    return team1
-                else:
-                    return self.get_team2_netids()
-            else:
-                return [self.winner_netid]
-        except Exception as e:
-            import logging
-            logging.error(f"Failed to get winning team for game {self.id}: {e}")
-            return []
+    @classmethod
+    def recent_row_view(cls, limit, netid=None):
+        """
+        Newest games as read-only row mappings, for list views that only
+        display them. Carries the game columns plus player1_name..player4_name
+        (None for empty doubles slots), fetched in one query without building
+        Game or User objects. netid restricts to games that user played in.
+        """
+        slots = (cls.player1_netid, cls.player2_netid, cls.player3_netid, cls.player4_netid)
+        players = [aliased(User) for _ in slots]
+        query = db.select(
+            cls.id, cls.timestamp, cls.game_type, cls.winner_netid, cls.elo_change,
+            cls.tournament_id, *slots,
+            *(player._full_name.label(f'player{n}_name') for n, player in enumerate(players, 1))
+        )
+        for slot, player in zip(slots, players):
+            query = query.outerjoin(player, player.netid == slot)
+        if netid is not None:
+            query = query.where(cls.involves(netid))
+        query = query.order_by(cls.timestamp.desc()).limit(limit)
+        return db.session.execute(query).mappings().all()
+    
+    @classmethod
+    def won_by(cls, netid):
+        """
+        SQL condition: netid was on the winning side.
+        Singles: netid is the winner. Doubles: the winner is on netid's team.
+        """
+        team1 = (cls.player1_netid, cls.player2_netid)
+        team2 = (cls.player3_netid, cls.player4_netid)
+        return or_(
+            cls.winner_netid == netid,
+            and_(
+                cls.game_type == 'doubles',
+                or_(
+                    and_(cls.winner_netid.in_(team1), or_(*(p == netid for p in team1))),
+                    and_(cls.winner_netid.in_(team2), or_(*(p == netid for p in team2)))
+                )
+            )
+        )
+    
+    # Game rows are never edited after they're recorded, so the team
+    # breakdowns below are worked out once per instance and reused by
+    # templates that ask for them several times per row.
+    
+    @cached_property
+    def is_doubles(self):
+        """True if this is a doubles game"""
+        return self.game_type == 'doubles'
     
-    def get_losing_team_netids(self):
-        """Get the netids of the losing team/player"""
-        if self.is_doubles():
-            winning_team = self.get_winning_team_netids()
-            if self.winner_netid in self.get_team1_netids():
-                return self.get_team2_netids()
-            else:
-                return self.get_team1_netids()
-        else:
-            return [self.get_loser_netid()]
+    @cached_property
+    def team1_netids(self):
+        """Team 1 player netids (always player1 and player2)"""
+        return (self.player1_netid, self.player2_netid)
+    
+    @cached_property
+    def team2_netids(self):
+        """Team 2 player netids (player3 and player4 for doubles, empty for singles)"""
+        if self.is_doubles:
+            return (self.player3_netid, self.player4_netid)
+        return ()
+    
+    @cached_property
+    def winning_team_netids(self):
+        """Netids of the winning team/player"""
+        if not self.winner_netid:
+            return ()
+        if self.is_doubles:
+            # For doubles, winner_netid represents one player, find their team
+            return self.team1_netids if self.winner_netid in self.team1_netids else self.team2_netids
+        return (self.winner_netid,)
+    
+    @cached_property
+    def losing_team_netids(self):
+        """Netids of the losing team/player"""
+        if self.is_doubles:
+            return self.team2_netids if self.winner_netid in self.team1_netids else self.team1_netids
+        return (self.get_loser_netid(),)
     
     def get_loser_netid(self):
         """Get the netid of the loser (singles only, for backward compatibility)"""
@@ -254,12 +406,10 @@ class Game(db.Model):
             return self.player2_netid
         return self.player1_netid
     
-    def get_all_player_netids(self):
-        """Get all players in the game"""
-        players = [self.player1_netid, self.player2_netid]
-        if self.is_doubles():
-            players.extend([self.player3_netid, self.player4_netid])
-        return players
+    @cached_property
+    def all_player_netids(self):
+        """All players in the game"""
+        return self.team1_netids + self.team2_netids
 
 
 class Tournament(db.Model):
@@ -267,22 +417,47 @@ class Tournament(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False)
-    format = db.Column(db.String(50), nullable=False)  # single_elim, double_elim, round_robin
-    status = db.Column(db.String(50), default='open', nullable=False, index=True)  # Index for filtering tournaments
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    format = db.Column(db.Enum('single_elim', 'double_elim', 'round_robin', name='tournament_format_enum'), nullable=False)
+    status = db.Column(db.Enum('open', 'active', 'completed', name='tournament_status_enum'), default='open', nullable=False, index=True)  # Index for filtering tournaments
+    created_at = db.Column(db.DateTime, server_default=UTC_NOW, nullable=False, index=True)
     created_by_admin_id = db.Column(db.Integer, db.ForeignKey('admins.id'), nullable=False)
     
-    # Relationships
-    participants = db.relationship('TournamentParticipant', backref='tournament', lazy='dynamic', cascade='all, delete-orphan')
-    games = db.relationship('Game', backref='tournament', lazy='dynamic')
-    matches = db.relationship('TournamentMatch', backref='tournament', lazy='dynamic', cascade='all, delete-orphan')
+    # Relationships. Each side is declared explicitly (back_populates) so the
+    # loading strategy can be chosen per direction. The collections stay lazy:
+    # list pages load many tournaments and read counts via with_counts(), and
+    # code that walks a collection asks for it with selectinload().
+    participants = db.relationship('TournamentParticipant', back_populates='tournament', lazy='select', cascade='all, delete-orphan')
+    games = db.relationship('Game', back_populates='tournament', lazy='select')
+    matches = db.relationship('TournamentMatch', back_populates='tournament', lazy='select', cascade='all, delete-orphan')
     
     def __repr__(self):
         return self.name
     
     def get_participant_count(self):
-        return self.participants.count()
-    
+        return db.session.query(func.count(TournamentParticipant.id))\
+            .filter(TournamentParticipant.tournament_id == self.id).scalar()
+
+    @classmethod
+    def with_counts(cls, *criterion, order_by=None, limit=None):
+        """
+        Tournaments matching criterion with participant counts from one grouped query.
+        Each tournament gets a pcount attribute so list pages avoid a COUNT per row.
+        """
+        query = db.session.query(cls, func.count(TournamentParticipant.id).label('pcount'))\
+            .outerjoin(TournamentParticipant, TournamentParticipant.tournament_id == cls.id)\
+            .filter(*criterion)\
+            .group_by(cls.id)
+        if order_by is not None:
+            query = query.order_by(order_by)
+        if limit is not None:
+            query = query.limit(limit)
+
+        tournaments = []
+        for tournament, pcount in query.all():
+            tournament.pcount = pcount
+            tournaments.append(tournament)
+        return tournaments
+
     def can_signup(self):
         return self.status == 'open'
     
@@ -305,6 +480,8 @@ class TournamentParticipant(db.Model):
         db.UniqueConstraint('tournament_id', 'user_netid', name='unique_tournament_participant'),
     )
     
+    tournament = db.relationship('Tournament', back_populates='participants')
+    
     def __repr__(self):
         return f'{self.user_netid} in {self.tournament.name}'
 
@@ -316,13 +493,17 @@ class TournamentMatch(db.Model):
     tournament_id = db.Column(db.Integer, db.ForeignKey('tournaments.id'), nullable=False)
     round_number = db.Column(db.Integer, nullable=False)  # 1, 2, 3, etc.
     match_number = db.Column(db.Integer, nullable=False)  # Position in round
-    bracket = db.Column(db.String(50), nullable=False)  # 'winners', 'losers', 'main' (for single elim/round robin)
+    bracket = db.Column(db.Enum('main', 'winners', 'losers', 'grand_finals', name='match_bracket_enum'), nullable=False)  # 'main' for single elim/round robin
     player1_netid = db.Column(db.String(50), db.ForeignKey('users.netid'), nullable=True)  # Can be null if TBD
     player2_netid = db.Column(db.String(50), db.ForeignKey('users.netid'), nullable=True)
     winner_netid = db.Column(db.String(50), db.ForeignKey('users.netid'), nullable=True)
     game_id = db.Column(db.Integer, db.ForeignKey('games.id'), nullable=True)
     completed = db.Column(db.Boolean, default=False, nullable=False)
     
+    # Result reporting always reads match.tournament, and a tournament row is
+    # small, so join it in with the match instead of a second SELECT
+    tournament = db.relationship('Tournament', back_populates='matches', lazy='joined', innerjoin=True)
+    
     def __repr__(self):
         return f'Match {self.match_number} (Round {self.round_number})'
     
@@ -4,26 +4,46 @@ Tracks request times, database queries, and cache performance.
 """
 
 import time
+import hashlib
 import logging
+import re
+import threading
+from collections import Counter, deque
 from functools import wraps
 from flask import g, request
 from sqlalchemy import event
-from sqlalchemy.engine import Engine
+from sqlalchemy.engine import Connection, Engine
 
 logger = logging.getLogger(__name__)
 
 # Performance metrics storage (in-memory, consider using Redis for production)
+# The requests deque drops the oldest entry in O(1) once full. request_duration and
+# slow_requests are running totals over the requests window, kept in step as
+# entries are added and evicted so get_metrics doesn't rescan the window.
+# slow_queries groups slow statements by a hash of their text (see
+# _record_slow_query); slow_query_count is the total across all of them.
 _performance_metrics = {
-    'requests': [],
-    'slow_queries': [],
+    'requests': deque(maxlen=1000),
+    'slow_queries': {},
+    'slow_query_count': 0,
+    'request_duration': 0.0,
+    'slow_requests': 0,
     'cache_hits': 0,
     'cache_misses': 0,
 }
 
+# Guards _performance_metrics; threaded workers record from several threads
+_metrics_lock = threading.Lock()
+
 # Configuration
 SLOW_QUERY_THRESHOLD = 0.05  # 50ms
+SLOW_QUERY_NS = int(SLOW_QUERY_THRESHOLD * 1e9)  # Same, for the integer clock in the query listener
+MAX_SLOW_QUERY_SHAPES = 100  # Distinct slow statements kept with a sample
 REQUEST_TIME_THRESHOLD = 1.0  # 1 second
 
+# SQL keywords checked by analyze_query_performance; group 2 catches "SELECT *"
+_SQL_KEYWORD_RE = re.compile(r'\b(SELECT|JOIN|LIMIT)\b(\s+\*)?', re.IGNORECASE)
+
 
 class PerformanceMonitor:
     """
@@ -45,27 +65,29 @@ class PerformanceMonitor:
         # Add after_request handler to record timing
         app.after_request(self._after_request)
         
-        # Add SQLAlchemy query monitoring
+        # SQLAlchemy query timing runs on every statement, so it's opt-in
+        # (PROFILE_QUERIES, defaulting to on in debug only); when off, no
+        # listeners are registered at all
+        profile_queries = app.config.get('PROFILE_QUERIES')
+        if profile_queries is None:
+            profile_queries = app.debug
+        if not profile_queries:
+            return
+        
+        # Statements don't nest on a connection, so one start time per
+        # connection is enough
         @event.listens_for(Engine, "before_cursor_execute")
         def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
-            conn.info.setdefault('query_start_time', []).append(time.time())
+            conn.info['query_start_time'] = time.perf_counter_ns()
         
         @event.listens_for(Engine, "after_cursor_execute")
         def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
-            total = time.time() - conn.info['query_start_time'].pop(-1)
+            # Integer nanoseconds: the common fast case is one subtract and compare
+            elapsed_ns = time.perf_counter_ns() - conn.info.pop('query_start_time')
             
             # Log slow queries
-            if total > SLOW_QUERY_THRESHOLD:
-                logger.warning(f"Slow query ({total:.3f}s): {statement[:200]}")
-                _performance_metrics['slow_queries'].append({
-                    'duration': total,
-                    'query': statement[:500],
-                    'timestamp': time.time()
-                })
-                
-                # Keep only last 100 slow queries
-                if len(_performance_metrics['slow_queries']) > 100:
-                    _performance_metrics['slow_queries'] = _performance_metrics['slow_queries'][-100:]
+            if elapsed_ns > SLOW_QUERY_NS:
+                _record_slow_query(statement, elapsed_ns / 1e9)
     
     def _before_request(self):
         """
@@ -96,11 +118,18 @@ class PerformanceMonitor:
                 'status_code': response.status_code
             }
             
-            _performance_metrics['requests'].append(metric)
-            
-            # Keep only last 1000 requests
-            if len(_performance_metrics['requests']) > 1000:
-                _performance_metrics['requests'] = _performance_metrics['requests'][-1000:]
+            with _metrics_lock:
+                window = _performance_metrics['requests']
+                if len(window) == window.maxlen:
+                    # append() will evict the oldest entry; take it out of the totals
+                    evicted = window[0]['duration']
+                    _performance_metrics['request_duration'] -= evicted
+                    if evicted > REQUEST_TIME_THRESHOLD:
+                        _performance_metrics['slow_requests'] -= 1
+                window.append(metric)
+                _performance_metrics['request_duration'] += elapsed
+                if elapsed > REQUEST_TIME_THRESHOLD:
+                    _performance_metrics['slow_requests'] += 1
             
             # Add performance header (only in debug mode)
             if self.app.debug:
@@ -112,28 +141,34 @@ class PerformanceMonitor:
         """
         Get current performance metrics.
         """
-        requests = _performance_metrics['requests']
+        # Read the running totals together so they describe the same window
+        with _metrics_lock:
+            total_requests = len(_performance_metrics['requests'])
+            request_duration = _performance_metrics['request_duration']
+            slow_requests = _performance_metrics['slow_requests']
+            slow_queries = _performance_metrics['slow_query_count']
+            cache_hits = _performance_metrics['cache_hits']
+            cache_misses = _performance_metrics['cache_misses']
         
-        if not requests:
+        if not total_requests:
             return {
                 'total_requests': 0,
                 'avg_response_time': 0,
                 'slow_requests': 0,
-                'slow_queries': len(_performance_metrics['slow_queries']),
+                'slow_queries': slow_queries,
                 'cache_hit_rate': 0
             }
         
-        avg_time = sum(r['duration'] for r in requests) / len(requests)
-        slow_requests = sum(1 for r in requests if r['duration'] > REQUEST_TIME_THRESHOLD)
+        avg_time = request_duration / total_requests
         
-        total_cache_ops = _performance_metrics['cache_hits'] + _performance_metrics['cache_misses']
-        cache_hit_rate = (_performance_metrics['cache_hits'] / total_cache_ops * 100) if total_cache_ops > 0 else 0
+        total_cache_ops = cache_hits + cache_misses
+        cache_hit_rate = (cache_hits / total_cache_ops * 100) if total_cache_ops > 0 else 0
         
         return {
-            'total_requests': len(requests),
+            'total_requests': total_requests,
             'avg_response_time': round(avg_time, 3),
             'slow_requests': slow_requests,
-            'slow_queries': len(_performance_metrics['slow_queries']),
+            'slow_queries': slow_queries,
             'cache_hit_rate': round(cache_hit_rate, 1)
         }
     
@@ -141,10 +176,37 @@ class PerformanceMonitor:
         """
         Reset all performance metrics.
         """
-        _performance_metrics['requests'].clear()
-        _performance_metrics['slow_queries'].clear()
-        _performance_metrics['cache_hits'] = 0
-        _performance_metrics['cache_misses'] = 0
+        with _metrics_lock:
+            _performance_metrics['requests'].clear()
+            _performance_metrics['slow_queries'].clear()
+            _performance_metrics['slow_query_count'] = 0
+            _performance_metrics['request_duration'] = 0.0
+            _performance_metrics['slow_requests'] = 0
+            _performance_metrics['cache_hits'] = 0
+            _performance_metrics['cache_misses'] = 0
+
+
+def _record_slow_query(statement, duration):
+    """
+    Record a slow query under a short hash of its statement text.
+    The same query shape tripping the threshold repeatedly only bumps its
+    count and total; the statement itself is copied the first time only.
+    """
+    key = hashlib.blake2b(statement.encode(), digest_size=8).hexdigest()
+    with _metrics_lock:
+        _performance_metrics['slow_query_count'] += 1
+        slow_queries = _performance_metrics['slow_queries']
+        entry = slow_queries.get(key)
+        if entry is None:
+            entry = {'count': 0, 'total_duration': 0.0, 'sample': None}
+            # Past the cap new shapes are counted in slow_query_count only
+            if len(slow_queries) < MAX_SLOW_QUERY_SHAPES:
+                entry['sample'] = statement[:500]
+                slow_queries[key] = entry
+        entry['count'] += 1
+        entry['total_duration'] += duration
+        count = entry['count']
+    logger.warning("Slow query %s (%.3fs) count=%d", key, duration, count)
 
 
 def profile_function(f):
@@ -173,39 +235,53 @@ def track_cache_hit():
     """
     Track a cache hit for metrics.
     """
-    _performance_metrics['cache_hits'] += 1
+    with _metrics_lock:
+        _performance_metrics['cache_hits'] += 1
 
 
 def track_cache_miss():
     """
     Track a cache miss for metrics.
     """
-    _performance_metrics['cache_misses'] += 1
+    with _metrics_lock:
+        _performance_metrics['cache_misses'] += 1
 
 
 class QueryCounter:
     """
     Context manager to count queries in a block of code.
     
+    Listens on one connection only (a Connection, or the connection of the
+    Session's current transaction), so queries from other threads aren't
+    counted. Pass record_queries=False to only count.
+    
     Usage:
-        with QueryCounter() as counter:
+        with QueryCounter(db.session) as counter:
             # ... database operations ...
             pass
         print(f"Queries executed: {counter.count}")
     """
     
-    def __init__(self):
+    def __init__(self, bind, record_queries=True):
+        self.bind = bind
+        self.record_queries = record_queries
         self.count = 0
         self.queries = []
+        self.conn = None
+        self._listener = self._record_query if record_queries else self._count_query
     
     def __enter__(self):
-        event.listen(Engine, "before_cursor_execute", self._before_cursor_execute)
+        self.conn = self.bind if isinstance(self.bind, Connection) else self.bind.connection()
+        event.listen(self.conn, "before_cursor_execute", self._listener)
         return self
     
     def __exit__(self, type, value, traceback):
-        event.remove(Engine, "before_cursor_execute", self._before_cursor_execute)
+        event.remove(self.conn, "before_cursor_execute", self._listener)
     
-    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+    def _count_query(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+    
+    def _record_query(self, conn, cursor, statement, parameters, context, executemany):
         self.count += 1
         self.queries.append({
             'statement': statement[:200],
@@ -224,19 +300,28 @@ def analyze_query_performance(query):
     warnings = []
     suggestions = []
     
+    # One pass over the SQL collects every keyword the checks below need
+    keywords = Counter()
+    select_star = False
+    for keyword, star in _SQL_KEYWORD_RE.findall(query_str):
+        keyword = keyword.upper()
+        keywords[keyword] += 1
+        if star and keyword == 'SELECT':
+            select_star = True
+    
     # Check for missing joins (potential N+1)
-    if 'SELECT' in query_str and 'JOIN' not in query_str:
-        if query_str.count('SELECT') > 1:
+    if keywords['SELECT'] and not keywords['JOIN']:
+        if keywords['SELECT'] > 1:
             warnings.append("Potential N+1 query detected")
             suggestions.append("Consider using joinedload() or subqueryload()")
     
     # Check for missing limit
-    if 'SELECT' in query_str and 'LIMIT' not in query_str:
+    if keywords['SELECT'] and not keywords['LIMIT']:
         warnings.append("Query without LIMIT clause")
         suggestions.append("Add .limit() to prevent loading too much data")
     
     # Check for SELECT *
-    if 'SELECT *' in query_str:
+    if select_star:
         warnings.append("Using SELECT * may load unnecessary columns")
         suggestions.append("Specify only needed columns with .with_entities()")
     
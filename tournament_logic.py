@@ -2,20 +2,39 @@
 Tournament bracket generation and management logic
 Supports single elimination, double elimination, and round robin formats
 """
-import math
+from functools import lru_cache
+from itertools import combinations
+from operator import itemgetter
+from sqlalchemy import func, or_
+from sqlalchemy.orm import selectinload
 from models import TournamentParticipant, TournamentMatch, Tournament, db
 
-def seed_participants(tournament):
+# (self-rating weight, ELO weight) for seeding, indexed by games played (capped at 10)
+# 0 games = 100% self-rating, 0% ELO
+# 1-9 games = linear transition from 1.0 to 0.1 for self-rating
+# 10+ games = 10% self-rating, 90% ELO
+SEED_WEIGHTS = (
+    [(1.0, 0.0)]
+    + [(1.0 - (games * 0.09), games * 0.09) for games in range(1, 10)]
+    + [(0.1, 0.9)]
+)
+
+def seed_participants(tournament, commit=True):
     """
     Seed participants based on a combination of self-rating and ELO
     - New players (few games): Weight self-rating more heavily
     - Experienced players (many games): Use ELO primarily
+    Pass commit=False to leave committing to the caller
     """
     try:
         if not tournament:
             raise ValueError("Tournament cannot be None")
         
-        participants = tournament.participants.all()
+        # Seeding reads every participant's user; load them all in one query
+        participants = TournamentParticipant.query\
+            .options(selectinload(TournamentParticipant.user))\
+            .filter_by(tournament_id=tournament.id)\
+            .order_by(TournamentParticipant.id).all()
         if not participants:
             return []
     except Exception as e:
@@ -28,7 +47,7 @@ def seed_participants(tournament):
         Returns higher score for better players
         """
         user = participant.user
-        games_played = len(user.get_all_games())
+        games_played = user.get_stats().total
         
         # Normalize self-rating to 0-1 scale (1-10 scale)
         self_rating_normalized = participant.self_rating / 10.0
@@ -38,47 +57,53 @@ def seed_participants(tournament):
         elo_normalized = (user.elo_rating - 800) / 800.0
         elo_normalized = max(0, min(1, elo_normalized))  # Clamp to 0-1
         
-        # Calculate weight based on games played
-        # 0 games = 100% self-rating, 0% ELO
-        # 10+ games = 10% self-rating, 90% ELO
-        # Use sigmoid-like curve for smooth transition
-        if games_played == 0:
-            self_weight = 1.0
-            elo_weight = 0.0
-        elif games_played < 10:
-            # Linear transition from 1.0 to 0.1 for self_weight
-            self_weight = 1.0 - (games_played * 0.09)
-            elo_weight = games_played * 0.09
-        else:
-            # After 10 games, heavily favor ELO
-            self_weight = 0.1
-            elo_weight = 0.9
+        # Weight based on games played (see SEED_WEIGHTS)
+        self_weight, elo_weight = SEED_WEIGHTS[min(games_played, 10)]
         
         # Calculate composite score
         composite_score = (self_rating_normalized * self_weight) + (elo_normalized * elo_weight)
         
         return composite_score
     
-    # Sort by composite score (descending) and then by signup time
-    sorted_participants = sorted(
-        participants,
-        key=lambda p: (-calculate_seed_score(p), p.id)
-    )
+    # Sort by composite score (descending) and then by signup time. Scores
+    # are computed once up front and the sort key is a C-level itemgetter
+    scored = [(-calculate_seed_score(p), p.id, p) for p in participants]
+    scored.sort(key=itemgetter(0, 1))
+    sorted_participants = [p for _, _, p in scored]
+    
+    # Seeds already match this order (e.g. a retried activation): nothing to write
+    if all(p.seed == i for i, p in enumerate(sorted_participants, 1)):
+        return sorted_participants
     
     # Assign seeds
     for i, participant in enumerate(sorted_participants, 1):
         participant.seed = i
     
-    db.session.commit()
+    if commit:
+        db.session.commit()
     return sorted_participants
 
 def get_next_power_of_two(n):
     """Get the next power of 2 greater than or equal to n"""
-    return 2 ** math.ceil(math.log2(n))
+    return 1 << (n - 1).bit_length()
+
+def insert_matches(matches):
+    """
+    Insert TournamentMatch rows given as dicts of column values
+    A single executemany INSERT rather than adding and flushing one ORM object per match
+    """
+    # Every row must have the same keys for one batched INSERT
+    for match in matches:
+        match.setdefault('player1_netid', None)
+        match.setdefault('player2_netid', None)
+    # A Core Table.insert() does not autoflush the session: pending ORM
+    # changes (e.g. the seeds set by seed_participants) are not written here,
+    # but by the caller's commit. Flush first if a later query needs them.
+    db.session.execute(TournamentMatch.__table__.insert(), matches)
 
-def create_single_elimination_bracket(tournament):
+def create_single_elimination_bracket(tournament, commit=True):
     """Create matches for single elimination tournament"""
-    participants = seed_participants(tournament)
+    participants = seed_participants(tournament, commit=commit)
     n_participants = len(participants)
     
     if n_participants < 2:
@@ -86,90 +111,90 @@ def create_single_elimination_bracket(tournament):
     
     # Calculate bracket size (next power of 2)
     bracket_size = get_next_power_of_two(n_participants)
-    n_rounds = int(math.log2(bracket_size))
+    n_rounds = bracket_size.bit_length() - 1
     
     # Create first round matches with proper seeding
     # Standard bracket seeding: 1v16, 8v9, 4v13, 5v12, 2v15, 7v10, 3v14, 6v11
     seeding_order = generate_seeding_order(bracket_size)
+    by_seed = {p.seed: p for p in participants}
     
-    round_1_matches = []
+    matches = []
     for i in range(0, len(seeding_order), 2):
         seed1 = seeding_order[i]
         seed2 = seeding_order[i + 1]
         
         # Get participants by seed (if they exist)
-        player1 = next((p for p in participants if p.seed == seed1), None)
-        player2 = next((p for p in participants if p.seed == seed2), None)
+        player1 = by_seed.get(seed1)
+        player2 = by_seed.get(seed2)
         
-        match = TournamentMatch(
+        matches.append(dict(
             tournament_id=tournament.id,
             round_number=1,
             match_number=(i // 2) + 1,
             bracket='main',
             player1_netid=player1.user_netid if player1 else None,
             player2_netid=player2.user_netid if player2 else None
-        )
-        round_1_matches.append(match)
-        db.session.add(match)
+        ))
     
     # Create placeholder matches for subsequent rounds
     for round_num in range(2, n_rounds + 1):
         n_matches = bracket_size // (2 ** round_num)
         for match_num in range(1, n_matches + 1):
-            match = TournamentMatch(
+            matches.append(dict(
                 tournament_id=tournament.id,
                 round_number=round_num,
                 match_number=match_num,
                 bracket='main'
-            )
-            db.session.add(match)
+            ))
     
-    db.session.commit()
+    insert_matches(matches)
+    if commit:
+        db.session.commit()
     return True, "Single elimination bracket created"
 
-def create_double_elimination_bracket(tournament):
+def create_double_elimination_bracket(tournament, commit=True):
     """Create matches for double elimination tournament"""
-    participants = seed_participants(tournament)
+    participants = seed_participants(tournament, commit=commit)
     n_participants = len(participants)
     
     if n_participants < 2:
         return False, "Need at least 2 participants"
     
     bracket_size = get_next_power_of_two(n_participants)
-    n_rounds = int(math.log2(bracket_size))
+    n_rounds = bracket_size.bit_length() - 1
     
     # Create winners bracket (same as single elimination)
     seeding_order = generate_seeding_order(bracket_size)
+    by_seed = {p.seed: p for p in participants}
     
     # Winners bracket round 1
+    matches = []
     for i in range(0, len(seeding_order), 2):
         seed1 = seeding_order[i]
         seed2 = seeding_order[i + 1]
         
-        player1 = next((p for p in participants if p.seed == seed1), None)
-        player2 = next((p for p in participants if p.seed == seed2), None)
+        player1 = by_seed.get(seed1)
+        player2 = by_seed.get(seed2)
         
-        match = TournamentMatch(
+        matches.append(dict(
             tournament_id=tournament.id,
             round_number=1,
             match_number=(i // 2) + 1,
             bracket='winners',
             player1_netid=player1.user_netid if player1 else None,
             player2_netid=player2.user_netid if player2 else None
-        )
-        db.session.add(match)
+        ))
     
     # Create placeholder matches for subsequent winners bracket rounds
     for round_num in range(2, n_rounds + 1):
         n_matches = bracket_size // (2 ** round_num)
         for match_num in range(1, n_matches + 1):
-            match = TournamentMatch(
+            matches.append(dict(
                 tournament_id=tournament.id,
                 round_number=round_num,
                 match_number=match_num,
                 bracket='winners'
-            )
-            db.session.add(match)
+            ))
     
     # Create losers bracket (approximately same number of rounds)
     # Losers bracket has alternating rounds of different sizes
@@ -181,70 +206,70 @@ def create_double_elimination_bracket(tournament):
             n_matches = max(1, bracket_size // (2 ** (round_num // 2 + 2)))
         
         for match_num in range(1, n_matches + 1):
-            match = TournamentMatch(
+            matches.append(dict(
                 tournament_id=tournament.id,
                 round_number=round_num,
                 match_number=match_num,
                 bracket='losers'
-            )
-            db.session.add(match)
+            ))
     
     # Create grand finals match
-    match = TournamentMatch(
+    matches.append(dict(
         tournament_id=tournament.id,
         round_number=1,
         match_number=1,
         bracket='grand_finals'
-    )
-    db.session.add(match)
+    ))
     
-    db.session.commit()
+    insert_matches(matches)
+    if commit:
+        db.session.commit()
     return True, "Double elimination bracket created"
 
-def create_round_robin_matches(tournament):
+def create_round_robin_matches(tournament, commit=True):
     """Create all matches for round robin tournament"""
-    participants = seed_participants(tournament)
+    participants = seed_participants(tournament, commit=commit)
     n_participants = len(participants)
     
     if n_participants < 2:
         return False, "Need at least 2 participants"
     
-    # Create matches for every pair of participants
-    match_num = 1
-    for i in range(n_participants):
-        for j in range(i + 1, n_participants):
-            match = TournamentMatch(
-                tournament_id=tournament.id,
-                round_number=1,  # All matches are in "round 1" for round robin
-                match_number=match_num,
-                bracket='main',
-                player1_netid=participants[i].user_netid,
-                player2_netid=participants[j].user_netid
-            )
-            db.session.add(match)
-            match_num += 1
-    
-    db.session.commit()
-    return True, f"Round robin schedule created with {match_num - 1} matches"
+    # Create matches for every pair of participants (in seed order)
+    matches = [
+        dict(
+            tournament_id=tournament.id,
+            round_number=1,  # All matches are in "round 1" for round robin
+            match_number=match_num,
+            bracket='main',
+            player1_netid=player1.user_netid,
+            player2_netid=player2.user_netid
+        )
+        for match_num, (player1, player2) in enumerate(combinations(participants, 2), 1)
+    ]
+    
+    insert_matches(matches)
+    if commit:
+        db.session.commit()
+    return True, f"Round robin schedule created with {len(matches)} matches"
 
+@lru_cache(maxsize=32)
 def generate_seeding_order(bracket_size):
     """
     Generate standard tournament seeding order
-    For 8 players: [1, 8, 4, 5, 2, 7, 3, 6]
-    For 16 players: [1, 16, 8, 9, 4, 13, 5, 12, 2, 15, 7, 10, 3, 14, 6, 11]
+    For 8 players: (1, 8, 4, 5, 2, 7, 3, 6)
+    For 16 players: (1, 16, 8, 9, 4, 13, 5, 12, 2, 15, 7, 10, 3, 14, 6, 11)
+    Cached per bracket size, so returned as a tuple
     """
-    rounds = int(math.log2(bracket_size))
+    rounds = bracket_size.bit_length() - 1
     seeds = [1, 2]
+    size = 2
     
+    # Each doubling pairs every seed with its mirror in the larger bracket
     for _ in range(rounds - 1):
-        new_seeds = []
-        for seed in seeds:
-            new_seeds.append(seed)
-            new_seeds.append(bracket_size + 1 - seed)
-        seeds = new_seeds
-        bracket_size //= 2
-    
-    return seeds
+        size *= 2
+        seeds = [s if k == 0 else size + 1 - s for s in seeds for k in (0, 1)]
+    
+    return tuple(seeds)
 
 def activate_tournament(tournament):
     """
@@ -264,14 +289,15 @@ def activate_tournament(tournament):
         print(f"[ERROR] Error checking tournament activation requirements: {e}")
         return False, f"Error activating tournament: {str(e)}"
     
-    # Generate bracket based on format
+    # Generate bracket based on format. Seeds, matches and the status change
+    # are committed together at the end, so activation is one transaction.
     try:
         if tournament.format == 'single_elim':
-            success, message = create_single_elimination_bracket(tournament)
+            success, message = create_single_elimination_bracket(tournament, commit=False)
         elif tournament.format == 'double_elim':
-            success, message = create_double_elimination_bracket(tournament)
+            success, message = create_double_elimination_bracket(tournament, commit=False)
         elif tournament.format == 'round_robin':
-            success, message = create_round_robin_matches(tournament)
+            success, message = create_round_robin_matches(tournament, commit=False)
         else:
             return False, f"Unknown tournament format: {tournament.format}"
         
@@ -280,6 +306,7 @@ def activate_tournament(tournament):
             db.session.commit()
             return True, f"Tournament activated. {message}"
         
+        db.session.rollback()
         return False, message
     except Exception as e:
         db.session.rollback()
@@ -328,10 +355,10 @@ def report_match_result(match, winner_netid, game_id):
             advance_double_elimination(match, winner_netid, loser_netid)
         # Round robin doesn't need advancement, all matches are predetermined
         
-        db.session.commit()
-        
-        # Check if tournament is complete
+        # Check if tournament is complete; the result, any advancement and
+        # the completion are committed together
         check_tournament_completion(tournament)
+        db.session.commit()
         
         return True, "Match result recorded"
     except Exception as e:
@@ -341,17 +368,22 @@ def report_match_result(match, winner_netid, game_id):
         traceback.print_exc()
         return False, f"Error recording match: {str(e)}"
 
+def update_participant(tournament, netid, **values):
+    """
+    Set columns on one participant with a single UPDATE
+    No SELECT first; a netid that isn't in the tournament updates nothing
+    """
+    TournamentParticipant.query.filter_by(
+        tournament_id=tournament.id,
+        user_netid=netid
+    ).update(values)
+
 def advance_single_elimination(match, winner_netid, loser_netid):
     """Advance winner to next round in single elimination"""
     tournament = match.tournament
     
     # Mark loser as eliminated
-    loser = TournamentParticipant.query.filter_by(
-        tournament_id=tournament.id,
-        user_netid=loser_netid
-    ).first()
-    if loser:
-        loser.eliminated = True
+    update_participant(tournament, loser_netid, eliminated=True)
     
     # Find next match for winner
     next_round = match.round_number + 1
@@ -426,27 +458,18 @@ def advance_double_elimination(match, winner_netid, loser_netid):
                 grand_finals.player2_netid = winner_netid
         
         # Loser is eliminated
-        participant = TournamentParticipant.query.filter_by(
-            tournament_id=tournament.id,
-            user_netid=loser_netid
-        ).first()
-        if participant:
-            participant.eliminated = True
+        update_participant(tournament, loser_netid, eliminated=True)
 
 def find_next_losers_bracket_slot(tournament, winners_round):
     """Find the appropriate losers bracket match for a player dropping from winners"""
-    # Simplified logic - find first available slot in losers bracket
-    losers_matches = TournamentMatch.query.filter_by(
-        tournament_id=tournament.id,
-        bracket='losers',
-        completed=False
-    ).order_by(TournamentMatch.round_number, TournamentMatch.match_number).all()
-    
-    for match in losers_matches:
-        if not match.player1_netid or not match.player2_netid:
-            return match
-    
-    return None
+    # Simplified logic - find first available slot in losers bracket.
+    # The open-slot test runs in SQL so only that one match is fetched.
+    return TournamentMatch.query.filter(
+        TournamentMatch.tournament_id == tournament.id,
+        TournamentMatch.bracket == 'losers',
+        TournamentMatch.completed == False,
+        or_(TournamentMatch.player1_netid.is_(None), TournamentMatch.player2_netid.is_(None))
+    ).order_by(TournamentMatch.round_number, TournamentMatch.match_number).first()
 
 def find_next_losers_bracket_match(tournament, current_match):
     """Find the next losers bracket match"""
@@ -460,30 +483,37 @@ def find_next_losers_bracket_match(tournament, current_match):
     return next_match
 
 def check_tournament_completion(tournament):
-    """Check if tournament is complete and assign placements"""
-    incomplete_matches = TournamentMatch.query.filter_by(
-        tournament_id=tournament.id,
-        completed=False
-    ).count()
+    """
+    Check if tournament is complete and assign placements
+    Leaves the commit to the caller
+    """
+    # EXISTS stops at the first unfinished match instead of counting them all
+    has_incomplete = db.session.query(
+        TournamentMatch.query.filter_by(
+            tournament_id=tournament.id,
+            completed=False
+        ).exists()
+    ).scalar()
     
-    if incomplete_matches == 0:
+    if not has_incomplete:
         tournament.status = 'completed'
         assign_placements(tournament)
-        db.session.commit()
 
 def assign_placements(tournament):
     """Assign final placements to tournament participants"""
     if tournament.format == 'round_robin':
-        # Count wins for each participant
-        participants = tournament.participants.all()
-        standings = []
-        
-        for participant in participants:
-            wins = TournamentMatch.query.filter_by(
-                tournament_id=tournament.id,
-                winner_netid=participant.user_netid
-            ).count()
-            standings.append((participant, wins))
+        # Count wins for each participant in one grouped query (completed
+        # matches only, so unplayed matches don't form a NULL-winner group)
+        participants = list(tournament.participants)
+        win_counts = dict(
+            db.session.query(TournamentMatch.winner_netid, func.count(TournamentMatch.id))
+            .filter(TournamentMatch.tournament_id == tournament.id, TournamentMatch.completed == True)
+            .group_by(TournamentMatch.winner_netid).all()
+        )
+        standings = [
+            (participant, win_counts.get(participant.user_netid, 0))
+            for participant in participants
+        ]
         
         # Sort by wins (descending)
         standings.sort(key=lambda x: -x[1])
@@ -500,13 +530,7 @@ def assign_placements(tournament):
                 bracket='grand_finals'
             ).first()
             if grand_finals and grand_finals.completed:
-                winner_netid = grand_finals.winner_netid
-                winner = TournamentParticipant.query.filter_by(
-                    tournament_id=tournament.id,
-                    user_netid=winner_netid
-                ).first()
-                if winner:
-                    winner.placement = 1
+                update_participant(tournament, grand_finals.winner_netid, placement=1)
         else:  # single_elim
             # Find the winner (last match in highest round)
             final_match = TournamentMatch.query.filter_by(
@@ -515,10 +539,5 @@ def assign_placements(tournament):
             ).order_by(TournamentMatch.round_number.desc()).first()
             
             if final_match and final_match.completed:
-                winner = TournamentParticipant.query.filter_by(
-                    tournament_id=tournament.id,
-                    user_netid=final_match.winner_netid
-                ).first()
-                if winner:
-                    winner.placement = 1
+                update_participant(tournament, final_match.winner_netid, placement=1)
 